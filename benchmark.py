@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+
+import argparse
+import itertools
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+import interval_graph
+import qtrd
+import qtrd_sweep
+import qtrd_v2
+
+
+def edgeDensity(graph):
+    """
+    :param graph: a graph
+    :return: the number of edges over the number of pairs of vertices
+    """
+    graph = interval_graph.toIntervalGraph(graph)
+    pairs = len(graph) * (len(graph) - 1) // 2
+    return sum(len(ids) for ids in graph.adjacency) / 2 / pairs if pairs else 0.0
+
+
+def checkerCall(graph):
+    """
+    :param graph: a graph
+    :return: the call of qtrdChecker on the qtrd_v1 solution of graph
+    """
+    solution = qtrd.qtrd_v1(graph)
+    return lambda: qtrd.qtrdChecker(graph, solution)
+
+
+ENUMERATION_LIMIT = 10000 # number of graphs taken from intervalGraphBruteForceGenerator by one call
+# name -> (function making the call to time from a graph and the rng, True if the call depends on the graph density)
+TARGETS = {
+    'qtrd_v1': (lambda graph, rng: lambda: qtrd.qtrd_v1(graph), True),
+    'qtrd_v2': (lambda graph, rng: lambda: qtrd_v2.qtrd_v2(graph), True),
+    'qtrdBruteForce': (lambda graph, rng: lambda: qtrd.qtrdBruteForce(graph), True),
+    'qtrdBruteForceGray': (lambda graph, rng: lambda: qtrd.qtrdBruteForceGray(graph), True),
+    'qtrdSweep': (lambda graph, rng: lambda: qtrd_sweep.qtrdSweep(graph), True),
+    'qtrdChecker': (lambda graph, rng: checkerCall(graph), True),
+    'connectedGraphs': (lambda graph, rng: lambda: list(qtrd_v2.connectedGraphs(graph)), True),
+    'intervalGraphGen': (lambda graph, rng: lambda: interval_graph.intervalGraphGen(len(graph), rng), False),
+    'intervalGraphBruteForceGenerator': (lambda graph, rng: lambda: sum(1 for _ in itertools.islice(
+        interval_graph.intervalGraphBruteForceGenerator(len(graph)), ENUMERATION_LIMIT)), False),
+}
+
+
+def percentile(times, q):
+    """
+    :param times: a list of durations
+    :param q: a percentile between 0 and 100
+    :return: the q-th percentile of times, linearly interpolated
+    """
+    return float(np.percentile(times, q)) if times else 0.0
+
+
+def timeTarget(name, order, density, samples, seed, repeat=3):
+    """
+    Time a target over samples graphs drawn with a fixed seed. Every call is timed repeat times and its fastest time is
+    kept, then one more pass under tracemalloc gives the peak memory of a call.
+
+    :param name: a key of TARGETS
+    :param order: the graph order
+    :param density: the edge density of the graphs, None for intervalGraphGen graphs
+    :param samples: the number of graphs
+    :param seed: the base seed, the graphs of an (order, density) pair are the same for every target
+    :param repeat: the number of runs of every call
+    :return: the result dict
+    """
+    make, _ = TARGETS[name]
+    rng = np.random.default_rng([seed, order, int(round((density or 0) * 1000))])
+    graphs = [interval_graph.densityGraphGen(order, density, rng) if density is not None
+              else interval_graph.intervalGraphGen(order, rng) for _ in range(samples)]
+    calls = [make(graph, rng) for graph in graphs]
+    times = []
+    for call in calls:
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            call()
+            best = min(best, time.perf_counter() - start)
+        times.append(best)
+    tracemalloc.start()
+    peak = 0
+    for call in calls:
+        tracemalloc.reset_peak()
+        call()
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+    tracemalloc.stop()
+    return {'target': name, 'order': order, 'density': density, 'samples': samples,
+            'edgeDensity': float(np.mean([edgeDensity(graph) for graph in graphs])),
+            'median': percentile(times, 50), 'p95': percentile(times, 95), 'peakMemory': peak}
+
+
+def runBenchmark(targets, orders, densities, samples, seed, bruteForceMax):
+    """
+    Time every target over the grid of orders and densities
+
+    :param targets: the names of the targets
+    :param orders: the graph orders
+    :param densities: the edge densities
+    :param samples: the number of graphs per point of the grid
+    :param seed: the base seed
+    :param bruteForceMax: the greatest order given to the brute force solvers
+    :return: the list of the result dicts
+    """
+    results = []
+    for name in targets:
+        for order in orders:
+            if name in ('qtrdBruteForce', 'qtrdBruteForceGray') and order > bruteForceMax:
+                continue
+            for density in densities if TARGETS[name][1] else [None]:
+                result = timeTarget(name, order, density, samples, seed)
+                results.append(result)
+                print(formatResult(result))
+    return results
+
+
+def resultKey(result):
+    return result['target'], result['order'], result['density']
+
+
+def formatResult(result, baseline=None):
+    """
+    :param result: a result dict
+    :param baseline: the baseline result of the same point, None if there is none
+    :return: a line of the report
+    """
+    density = '-' if result['density'] is None else result['density']
+    line = '{:<34} n={:<5} d={:<5} median {:>10.1f} us  p95 {:>10.1f} us  peak {:>9} B'.format(
+        result['target'], result['order'], density, result['median'] * 1e6, result['p95'] * 1e6, result['peakMemory'])
+    if baseline is not None and baseline['median'] > 0:
+        line += '  x{:.2f}'.format(result['median'] / baseline['median'])
+    return line
+
+
+def compareBaseline(results, baseline, threshold):
+    """
+    Compare results to a baseline, a point of the grid regresses when its median is more than 1 + threshold times the
+    baseline median
+
+    :param results: the list of the result dicts
+    :param baseline: the list of the baseline result dicts
+    :param threshold: the relative slowdown allowed
+    :return: the list of the (result, baseline result) pairs which regress
+    """
+    saved = {resultKey(result): result for result in baseline}
+    regressions = []
+    for result in results:
+        previous = saved.get(resultKey(result))
+        if previous is None:
+            continue
+        print(formatResult(result, previous))
+        if result['median'] > (1 + threshold) * previous['median']:
+            regressions.append((result, previous))
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the QTRD solvers, checker and graph generators')
+    parser.add_argument('-t', '--targets', nargs='+', choices=list(TARGETS), default=list(TARGETS),
+                        help='the functions to time')
+    parser.add_argument('-o', '--orders', nargs='+', type=int, default=[5, 8, 20, 50], help='the graph orders')
+    parser.add_argument('-d', '--densities', nargs='+', type=float, default=[0.1, 0.3, 0.6],
+                        help='the edge densities of the graphs')
+    parser.add_argument('-s', '--samples', type=int, default=20, help='the number of graphs per order and density')
+    parser.add_argument('--seed', type=int, default=0, help='the seed of the graphs')
+    parser.add_argument('--brute-force-max', type=int, dest='bruteForceMax', default=8,
+                        help='the greatest order given to the brute force solvers')
+    parser.add_argument('--json', type=str, help='write the results to this JSON file')
+    parser.add_argument('--baseline', type=str, help='JSON results of a previous run to compare with')
+    parser.add_argument('--threshold', type=float, default=0.1, help='the relative slowdown of a median reported '
+                                                                     'as a regression')
+    args = vars(parser.parse_args())
+
+    results = runBenchmark(args['targets'], args['orders'], args['densities'], args['samples'], args['seed'],
+                           args['bruteForceMax'])
+    if args['json']:
+        with open(args['json'], 'w') as file:
+            json.dump({'python': platform.python_version(), 'numpy': np.__version__, 'seed': args['seed'],
+                       'samples': args['samples'], 'results': results}, file, indent=1)
+    if args['baseline']:
+        with open(args['baseline']) as file:
+            regressions = compareBaseline(results, json.load(file)['results'], args['threshold'])
+        for result, previous in regressions:
+            print('Regression:', formatResult(result, previous))
+        if regressions:
+            sys.exit(1)
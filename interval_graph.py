@@ -1,30 +1,218 @@
 #!/usr/bin/env python3
 import argparse
-import random
+import mmap
+import os
+import struct
 import timeit
 from collections import OrderedDict
+from functools import lru_cache
+from math import factorial
 
 import matplotlib.pyplot as plt
+import numpy as np
 from matplotlib.patches import Patch
 
+import profiling
 
-def intervalGraphGen(order):
+
+SMALL_ORDER = 2048 # largest order generated by removing the endpoints one by one from a list
+
+
+def intervalGraphGen(order, rng=None):
     """
-    Normalized interval model to generate random interval graphs
+    Normalized interval model to generate random interval graphs. The left endpoint is drawn among the remaining
+    endpoints but the last one and the right endpoint among the remaining endpoints after it, see randomIntervalGraphs.
+    A small graph pops its endpoints from a list, which costs less than the NumPy decoding, with the same draws so a
+    seed gives the same graph at any order.
 
     :param order: The graph order
+    :param rng: a seed or a NumPy Generator, None for a random seed
     :return: a tuple list representing a random interval graphs
     """
-    remaining = [i for i in range(2 * order)]
+    if order > SMALL_ORDER:
+        intervals = randomIntervalGraphs(order, 1, rng)[0]
+        return list(zip(intervals[:, 0].tolist(), intervals[:, 1].tolist()))
+    lefts, rights = _endpointRanks(order, 1, rng)
+    remaining = list(range(2 * order))
     graph = []
-    while remaining:
-        i = random.randint(0, len(remaining) - 2)
+    for i, j in zip(lefts[0].tolist(), rights[0].tolist()):
         left = remaining.pop(i)
-        right = remaining.pop(random.randint(i, len(remaining) - 1))
-        graph.append((left, right))
+        graph.append((left, remaining.pop(j)))
     return graph
 
 
+def _endpointRanks(order, count, rng):
+    """
+    :param order: The graph order
+    :param count: the number of graphs
+    :param rng: a seed or a NumPy Generator, None for a random seed
+    :return: the count x order matrices of the rank of every left endpoint among the remaining endpoints and of every
+    right endpoint among the remaining endpoints once the left one is removed
+    """
+    rng = np.random.default_rng(rng)
+    remaining = 2 * order - 2 * np.arange(order, dtype=np.int64) # endpoints remaining before every interval
+    lefts = rng.integers(0, remaining - 1, size=(count, order))
+    rights = lefts + rng.integers(0, remaining - 1 - lefts)
+    return lefts, rights
+
+
+def randomIntervalGraphs(order, count, rng=None):
+    """
+    Draw count random normalized interval models of an order, with the distribution of intervalGraphGen. The draw of
+    every endpoint is a rank among the remaining endpoints, so all the ranks are drawn at once and turned into endpoints
+    by _lehmerDecode in O(order log order) instead of removing them one by one from a list.
+
+    :param order: The graph order
+    :param count: the number of graphs
+    :param rng: a seed or a NumPy Generator, None for a random seed
+    :return: a count x order x 2 int32 array, the intervals of every graph in generation order
+    """
+    lefts, rights = _endpointRanks(order, count, rng)
+    size = 1 << max(2 * order - 1, 0).bit_length()
+    codes = np.zeros((count, size), dtype=np.int32) # the padding pops the endpoints added after the last one
+    codes[:, 0:2 * order:2] = lefts
+    codes[:, 1:2 * order:2] = rights
+    return _lehmerDecode(codes)[:, :2 * order].reshape(count, order, 2)
+
+
+def densityGraphGen(order, density, rng=None):
+    """
+    Random normalized interval model with a given edge density, the left endpoints are uniform in [0, 1] and the
+    lengths uniform in [0, density], so two intervals overlap with probability about density. The graphs of
+    intervalGraphGen have an average degree about order / 2, a small density gives sparse graphs with many components
+    instead.
+
+    :param order: the graph order
+    :param density: the expected edge density, between 0 and 1
+    :param rng: a seed or a NumPy Generator, None for a random seed
+    :return: a tuple list representing the graph
+    """
+    rng = np.random.default_rng(rng)
+    lefts = rng.random(order)
+    rights = lefts + rng.random(order) * density
+    return normalizeGraph(list(zip(lefts.tolist(), rights.tolist())))
+
+
+SLAB_SIZE = 1 << 16 # length of the pieces of the codes merged apart while they fit in the cache
+BLOCK_SIZE = 32 # length of the pieces of the codes decoded by comparing their codes two by two
+CHUNKS = 32 # number of pieces of a row of codes whose endpoints are removed one piece after the other
+
+
+def _lehmerDecode(codes):
+    """
+    Endpoints popped by every row of codes, the k-th one is the codes[k]-th smallest of 0..N-1 not popped before.
+    A row is cut into CHUNKS pieces, a piece is decoded relative to the endpoints remaining before it, then the pieces
+    take their endpoints from the remaining ones one after the other. A piece is decoded by merging halves of growing
+    size: the values of a second half are known relative to the endpoints left by the first half, and the first half
+    values minus their rank are its merge keys, so a merge is a stable sort of two sorted runs. The halves of
+    BLOCK_SIZE codes are decoded directly by _decodeBlocks.
+
+    :param codes: an int32 matrix, the length N of a row is a power of two and codes[k] < N - k
+    :return: the int32 matrix of the popped endpoints
+    """
+    rows, size = codes.shape
+    block = min(BLOCK_SIZE, size)
+    chunk = max(min(SLAB_SIZE, size), size // CHUNKS)
+    values, origins = _decodeBlocks(codes.reshape(-1, block))
+    slab = min(max(SLAB_SIZE, block), chunk)
+    for start in range(0, rows * size, slab):
+        piece = slice(start, start + slab)
+        values[piece], origins[piece] = _mergeHalves(values[piece], origins[piece], block, slab)
+    values, origins = _mergeHalves(values, origins, slab, chunk)
+    if chunk < size:
+        values = _removeChunks(values.reshape(rows, size // chunk, chunk))
+    decoded = np.empty_like(values)
+    decoded[origins] = values
+    return decoded.reshape(rows, size)
+
+
+def _decodeBlocks(codes):
+    """
+    Endpoints popped by every row of codes relative to the endpoints remaining before the row. The k-th rank starts
+    at codes[k] and goes back over the codes before it, from the last one: a code at most equal to the current rank
+    popped an endpoint below, so the rank grows by one. The row length is small, comparing its codes two by two costs
+    less than merging.
+
+    :param codes: an int32 matrix
+    :return: the values of every row sorted and the index in codes of every value, as flat int32 arrays
+    """
+    rows, size = codes.shape
+    codes = np.ascontiguousarray(codes.T)
+    ranks = codes.copy()
+    below = np.empty(codes.shape, dtype=bool)
+    for k in range(size - 2, -1, -1):
+        np.less_equal(codes[k], ranks[k + 1:], out=below[k + 1:])
+        ranks[k + 1:] += below[k + 1:]
+    bits = (size - 1).bit_length()
+    dtype = np.int32 if int(ranks.max(initial=0)) < 1 << (31 - bits) else np.int64
+    packed = ranks.astype(dtype) << bits # the rank and the index in the row, sorted by rank
+    packed |= np.arange(size, dtype=dtype)[:, None]
+    packed = np.ascontiguousarray(packed.T)
+    packed.sort(axis=1)
+    origins = packed & (size - 1)
+    origins += np.arange(0, rows * size, size, dtype=dtype)[:, None]
+    packed >>= bits
+    return packed.astype(np.int32).reshape(-1), origins.astype(np.int32).reshape(-1)
+
+
+def _removeChunks(values):
+    """
+    Endpoints of the pieces of every row of _lehmerDecode, each one takes its endpoints among the endpoints left by the
+    pieces before it
+
+    :param values: a rows x pieces x length matrix, the sorted values of every piece relative to the endpoints remaining
+    before it
+    :return: the flat array of the endpoints in the same order
+    """
+    rows, pieces, length = values.shape
+    remaining = np.tile(np.arange(pieces * length, dtype=np.int32), (rows, 1))
+    for k in range(pieces):
+        ranks = values[:, k]
+        left = np.ones(remaining.shape, dtype=bool)
+        np.put_along_axis(left, ranks, False, axis=1)
+        values[:, k] = np.take_along_axis(remaining, ranks, axis=1)
+        remaining = remaining[left].reshape(rows, -1)
+    return values.reshape(-1)
+
+
+def _mergeHalves(values, origins, half, stop):
+    """
+    Merge steps of _lehmerDecode from blocks of size half to blocks of size stop. The merge keys are doubled and the
+    second half ones made odd, so a sort of the int32 keys of a block keeps the first half first on equal keys, and the
+    number of second half values before every position gives the shift of its value and the index it comes from.
+
+    :param values: the int32 values of every block sorted, relative to the endpoints remaining before the block
+    :param origins: the index in the code of every value
+    :param half: the current block size
+    :param stop: the block size to reach
+    :return: the values and origins with blocks of size stop
+    """
+    position = np.arange(len(values), dtype=np.int32)
+    while half < stop:
+        keys = values.reshape(-1, 2, half) << 1
+        keys[:, 0] -= np.arange(0, 2 * half, 2, dtype=np.int32)
+        keys[:, 1] += 1
+        keys = keys.reshape(-1, 2 * half)
+        keys.sort(axis=1)
+        keys = keys.reshape(-1)
+        second = keys & 1
+        keys >>= 1
+        before = np.cumsum(second, dtype=np.int32) # second half values before every position, from the first block
+        before -= second
+        start = position & -2 * half # the position of the block
+        before -= start >> 1
+        shift = position - start
+        shift -= before # first half values before every position
+        keys += shift
+        values = keys
+        before += half
+        source = np.where(second.astype(bool), before, shift)
+        source += start
+        origins = origins[source]
+        half *= 2
+    return values, origins
+
+
 def drawGraphTerminal(graph):
     """
     Draw the graph on the terminal
@@ -92,6 +280,8 @@ def neighbor(graph, v):
     :param v: an interval
     :return: the list of the neighbor of v in the graph
     """
+    if isinstance(graph, IntervalGraph):
+        return graph.neighbors(v)
     l_v = v[0]
     r_v = v[1]
     neighbor = []
@@ -114,37 +304,892 @@ def closedNeighbor(graph, v):
     return neighbor(graph, v) + [v]
 
 
-def intervalGraphBruteForceGenerator(order):
+def overlap(u, v):
+    """
+    Test if two intervals have overlapping interiors, which is the neighbor predicate of two vertices. Two copies of a
+    non empty interval overlap, touching and empty intervals do not.
+
+    :param u: an interval
+    :param v: an interval
+    :return: True if u and v are adjacent
+    """
+    return u[0] < u[1] and v[0] < v[1] and max(u[0], v[0]) < min(u[1], v[1])
+
+
+class IntervalGraph:
+    """
+    Interval graph with its adjacency built once by an endpoint sweep
+
+    Vertices are the intervals themselves, each one has an integer id which is its position in the graph. Neighbor
+    lists keep the graph order so the solvers make the same choices as with the tuple list. An interval can be in the
+    graph several times, its copies are distinct vertices adjacent to each other, ids gives the id of the first copy
+    and positions the ids of all of them.
+    """
+
+    def __init__(self, graph):
+        """
+        :param graph: a tuple list representing a graph
+        """
+        self.intervals = list(graph)
+        self.positions = {} # interval -> ids of its copies in graph order
+        for i, v in enumerate(self.intervals):
+            self.positions.setdefault(v, []).append(i)
+        self.ids = {v: copies[0] for v, copies in self.positions.items()}
+        self.adjacency = [[] for _ in self.intervals]
+        events = []
+        for i, (left, right) in enumerate(self.intervals):
+            if left < right:
+                events.append((left, 1, i))
+                events.append((right, 0, i))
+        events.sort() # ends before starts on a shared endpoint, touching intervals are not adjacent
+        active = []
+        for _, start, i in events:
+            if start:
+                for j in active:
+                    self.adjacency[i].append(j)
+                    self.adjacency[j].append(i)
+                active.append(i)
+            else:
+                active.remove(i)
+        for ids in self.adjacency:
+            ids.sort()
+
+    def __len__(self):
+        return len(self.intervals)
+
+    def __iter__(self):
+        return iter(self.intervals)
+
+    def __getitem__(self, i):
+        return self.intervals[i]
+
+    def __contains__(self, v):
+        return v in self.ids
+
+    def __repr__(self):
+        return repr(self.intervals)
+
+    def index(self, v):
+        """
+        :param v: an interval of the graph
+        :return: the id of v
+        """
+        return self.ids[v]
+
+    def neighbors(self, v):
+        """
+        :param v: an interval
+        :return: the list of the neighbor of v in the graph
+        """
+        i = self.ids.get(v)
+        if i is None:
+            return [u for u in self.intervals if overlap(u, v)]
+        return [self.intervals[j] for j in self.adjacency[i]]
+
+    def closed_neighbors(self, v):
+        """
+        :param v: an interval
+        :return: the neighbor of v union v in the graph
+        """
+        return self.neighbors(v) + [v]
+
+    def degree(self, v):
+        """
+        :param v: an interval
+        :return: the number of neighbor of v in the graph
+        """
+        i = self.ids.get(v)
+        if i is None:
+            return len(self.neighbors(v))
+        return len(self.adjacency[i])
+
+    def adjacent(self, u, v):
+        """
+        :param u: an interval
+        :param v: an interval
+        :return: True if u is a neighbor of v, two copies of an interval are neighbors
+        """
+        return overlap(u, v)
+
+    def closed_adjacent(self, u, v):
+        """
+        :param u: an interval
+        :param v: an interval
+        :return: True if u is in the closed neighborhood of v
+        """
+        return u == v or overlap(u, v)
+
+    def adjacencyMatrix(self, dtype=np.float32):
+        """
+        :param dtype: the NumPy type of the matrix
+        :return: the n x n adjacency matrix of the graph, 1 on an edge and 0 elsewhere
+        """
+        n = len(self.intervals)
+        matrix = np.zeros((n, n), dtype=dtype)
+        rows = [i for i in range(n) for _ in self.adjacency[i]]
+        columns = [j for ids in self.adjacency for j in ids]
+        matrix[rows, columns] = 1
+        return matrix
+
+
+class IntervalArray:
+    """
+    Compact interval storage with left and right endpoints in two int32 arrays, the vertex id of an interval is its
+    index in the arrays. Queries are vectorized over all the intervals at once.
+    """
+
+    def __init__(self, left, right):
+        """
+        :param left: the left endpoints
+        :param right: the right endpoints
+        """
+        self.left = np.ascontiguousarray(left, dtype=np.int32)
+        self.right = np.ascontiguousarray(right, dtype=np.int32)
+        if self.left.shape != self.right.shape or self.left.ndim != 1:
+            raise ValueError("left and right must be one dimensional arrays of the same length")
+        self.ids = np.arange(len(self.left), dtype=np.int32)
+
+    @classmethod
+    def fromGraph(cls, graph):
+        """
+        :param graph: a tuple list representing a graph
+        :return: the IntervalArray of graph
+        """
+        endpoints = np.array(list(graph), dtype=np.int32).reshape(-1, 2)
+        return cls(endpoints[:, 0], endpoints[:, 1])
+
+    def toGraph(self):
+        """
+        :return: a tuple list representing the graph
+        """
+        return list(zip(self.left.tolist(), self.right.tolist()))
+
+    def __len__(self):
+        return len(self.left)
+
+    @property
+    def nbytes(self):
+        return self.left.nbytes + self.right.nbytes + self.ids.nbytes
+
+    def overlaps(self, v):
+        """
+        The neighbor predicate of v against every interval
+
+        :param v: a vertex id
+        :return: a boolean mask of the neighbor of v, with the rule of overlap
+        """
+        l_v = self.left[v]
+        r_v = self.right[v]
+        return (self.left < r_v) & (l_v < self.right) & (self.left < self.right) & (l_v < r_v) & (self.ids != v)
+
+    def neighbors(self, v):
+        """
+        :param v: a vertex id
+        :return: the ids of the neighbor of v
+        """
+        return np.flatnonzero(self.overlaps(v))
+
+    def overlapCount(self, mask):
+        """
+        Count for every interval the intervals of a subset overlapping it, the interval itself excluded. An interval u
+        overlaps v iff l_u < r_v and r_u > l_v, and every u with r_u <= l_v also has l_u < r_v, so the count is a
+        difference of two binary searches.
+
+        :param mask: a boolean mask of the subset
+        :return: an int array of the number of neighbor in the subset
+        """
+        mask = np.asarray(mask, dtype=bool)
+        lefts = np.sort(self.left[mask])
+        rights = np.sort(self.right[mask])
+        count = np.searchsorted(lefts, self.right, side='left') - np.searchsorted(rights, self.left, side='right')
+        return count - mask
+
+    def degrees(self):
+        """
+        :return: the degree of every vertex
+        """
+        return self.overlapCount(np.ones(len(self), dtype=bool))
+
+    def dominated(self, labels):
+        """
+        Dominated vertices under a labeling, a vertex is dominated if it is in V1 or V2 or has a neighbor in V2
+
+        :param labels: the label (0, 1 or 2) of every vertex
+        :return: a boolean mask of the dominated vertices
+        """
+        labels = np.asarray(labels)
+        return (labels > 0) | (self.overlapCount(labels == 2) > 0)
+
+    def isolated(self, labels):
+        """
+        Isolated vertices under a labeling, a vertex is isolated if none of its neighbor is in V1 or V2
+
+        :param labels: the label (0, 1 or 2) of every vertex
+        :return: a boolean mask of the isolated vertices
+        """
+        labels = np.asarray(labels)
+        return self.overlapCount(labels > 0) == 0
+
+
+def toIntervalGraph(graph):
+    """
+    Wrap a tuple list into an IntervalGraph, an IntervalGraph is returned as is
+
+    :param graph: a graph
+    :return: the IntervalGraph of graph
+    """
+    if isinstance(graph, IntervalGraph):
+        return graph
+    return IntervalGraph(graph)
+
+
+def intervalGraphCount(order):
+    """
+    Number of position lists generated by intervalGraphBruteForceGenerator, f(order) = (2 * order - 1) * f(order - 1)
+
+    :param order: order of graphs
+    :return: the number of interval graphs for order
+    """
+    count = 1 if order >= 1 else 0
+    for i in range(2, order + 1):
+        count *= 2 * i - 1
+    return count
+
+
+def intervalGraphBruteForceGenerator(order, start=0, stop=None):
     """
     Generator of all interval graphs from an order
     f a func defining the number of graph generated:
     - f(0) = 0
     - f(order) = (2 * order - 1) * f(order - 1)
+    The positions are built depth first in a single list, so memory does not depend on the number of graphs. They are
+    yielded in lexicographic order, which is the order of rank.
+
+    :param order: order of graphs
+    :param start: rank of the first position list to yield
+    :param stop: rank after the last position list to yield, None for all
+    :return: generator of the position lists representing all the possibilities for the interval graphs for order
+    """
+    total = intervalGraphCount(order)
+    if stop is None or stop > total:
+        stop = total
+    if start >= stop:
+        return
+    length = 2 * order
+    positions = unrankPositions(order, start)
+    count = [2] * order # number of endpoints placed for each interval
+    opened = order # number of intervals already started
+    nextPossibility = 0
+    remaining = stop - start
+    while True:
+        possibility = None
+        if len(positions) == length:
+            yield positions.copy()
+            remaining -= 1
+            if remaining == 0:
+                return
+        else:
+            maxPossibility = min(opened, order - 1) # maximum possibility for the next position
+            possibility = nextPossibility
+            while possibility <= maxPossibility and count[possibility] > 1: # skipping already ended possibilities
+                possibility += 1
+            if possibility > maxPossibility:
+                possibility = None
+        if possibility is None:
+            if len(positions) == 1:
+                return
+            last = positions.pop()
+            count[last] -= 1
+            if count[last] == 0:
+                opened -= 1
+            nextPossibility = last + 1
+        else:
+            positions.append(possibility)
+            count[possibility] += 1
+            if count[possibility] == 1:
+                opened += 1
+            nextPossibility = 0
+
+
+def allIntervalGraphs(order, start=0, stop=None):
+    """
+    Generator of all interval graphs from an order, one graph at a time
+
+    :param order: order of graphs
+    :param start: rank of the first graph to yield
+    :param stop: rank after the last graph to yield, None for all
+    :return: generator of tuple lists representing the graphs
+    """
+    for positions in intervalGraphBruteForceGenerator(order, start, stop):
+        yield graphFromPosition(positions)
+
+
+@lru_cache(maxsize=None)
+def completionCount(opened, unopened):
+    """
+    Number of ways to end a position list
+
+    :param opened: number of intervals started but not ended
+    :param unopened: number of intervals not started
+    :return: the number of completions
+    """
+    if opened == 0 and unopened == 0:
+        return 1
+    count = 0
+    if opened > 0:
+        count += opened * completionCount(opened - 1, unopened)
+    if unopened > 0:
+        count += completionCount(opened + 1, unopened - 1)
+    return count
+
+
+def rankPositions(positions):
+    """
+    Rank of a position list in the order of intervalGraphBruteForceGenerator
+
+    :param positions: a list of position representing the interval disposition
+    :return: the index of positions in the enumeration
+    """
+    order = len(positions) // 2
+    count = [0] * order
+    count[positions[0]] = 1
+    opened = 1
+    rank = 0
+    for p in positions[1:]:
+        open_ids = [i for i in range(opened) if count[i] == 1]
+        smaller = sum(1 for i in open_ids if i < p) # candidates before p, the new interval is always the greatest
+        rank += smaller * completionCount(len(open_ids) - 1, order - opened)
+        count[p] += 1
+        if count[p] == 1:
+            opened += 1
+    return rank
 
+
+def unrankPositions(order, index):
+    """
+    Position list of a rank in the order of intervalGraphBruteForceGenerator
+
+    :param order: order of graphs
+    :param index: the index of the position list in the enumeration
+    :return: the position list
+    """
+    if not 0 <= index < intervalGraphCount(order):
+        raise ValueError("index " + str(index) + " out of range for order " + str(order))
+    positions = [0]
+    count = [0] * order
+    count[0] = 1
+    opened = 1
+    for _ in range(2 * order - 1):
+        open_ids = [i for i in range(opened) if count[i] == 1]
+        block = completionCount(len(open_ids) - 1, order - opened) if open_ids else 0
+        if index < block * len(open_ids):
+            p = open_ids[index // block]
+            index %= block
+        else:
+            index -= block * len(open_ids)
+            p = opened
+        positions.append(p)
+        count[p] += 1
+        if count[p] == 1:
+            opened += 1
+    return positions
+
+
+def positionFromGraph(graph):
+    """
+    Position list of a graph from a normalized model, the reverse of graphFromPosition
+
+    :param graph: a tuple list representing a graph with endpoints 0 to 2 * order - 1
+    :return: the list of position
+    """
+    positions = [0] * (2 * len(graph))
+    for i, (left, right) in enumerate(sorted(graph)):
+        positions[left] = i
+        positions[right] = i
+    return positions
+
+
+def rank(graph):
+    """
+    :param graph: a tuple list representing a graph with endpoints 0 to 2 * order - 1
+    :return: the index of graph in the enumeration of allIntervalGraphs
+    """
+    return rankPositions(positionFromGraph(graph))
+
+
+def unrank(order, index):
+    """
     :param order: order of graphs
-    :return: list of position representing all the possibilities for the interval graphs for order
-    """
-    graphs = []
-    if (order < 1):
-        return graphs
-    graphs.append([0])
-    for i in range((2 * order)- 1):
-        newGraphs = []
-        for j in range(len(graphs)):
-            graph = graphs[j]
-            maxPossibility = max(graph)+1 # maximum possibility for the next position
-            if maxPossibility > order - 1:
-                maxPossibility = order - 1
-            possibilities = [i for i in range(maxPossibility+1)]
-            for n in range(maxPossibility+1):
-                if graph.count(n) > 1: # removing already ended possibilities
-                    possibilities.remove(n)
-            for possibility in possibilities:
-                g = graph.copy()
-                g.append(possibility)
-                newGraphs.append(g)
-        graphs = newGraphs.copy()
-    return graphs
+    :param index: an index in the enumeration of allIntervalGraphs
+    :return: the graph at index
+    """
+    return graphFromPosition(unrankPositions(order, index))
+
+
+def endpointRuns(graph):
+    """
+    Maximal runs of consecutive left endpoints or consecutive right endpoints of a normalized model. Reordering the
+    endpoints inside a run does not change the graph.
+
+    :param graph: a tuple list representing a graph with endpoints 0 to 2 * order - 1
+    :return: the list of (start run, end run) of the intervals and the list of the run lengths
+    """
+    isLeft = [False] * (2 * len(graph))
+    for left, _ in graph:
+        isLeft[left] = True
+    run = [0] * len(isLeft)
+    lengths = []
+    for p in range(len(isLeft)):
+        if p == 0 or isLeft[p] != isLeft[p - 1]:
+            lengths.append(0)
+        run[p] = len(lengths) - 1
+        lengths[-1] += 1
+    return [(run[left], run[right]) for left, right in graph], lengths
+
+
+def mirrorGraph(graph):
+    """
+    :param graph: a tuple list representing a graph with endpoints 0 to 2 * order - 1
+    :return: the left-right mirror of graph, sorted by left endpoint
+    """
+    last = 2 * len(graph) - 1
+    return sorted((last - right, last - left) for left, right in graph)
+
+
+def canonicalModel(graph):
+    """
+    Representative of the models obtained by reordering endpoints inside their runs: in a run of left endpoints the
+    intervals ending in a later run start first, in a run of right endpoints the intervals end in left endpoint order.
+
+    :param graph: a tuple list representing a graph with endpoints 0 to 2 * order - 1
+    :return: the canonical model, sorted by left endpoint
+    """
+    return canonicalMapping(graph, False)[0]
+
+
+def canonicalMapping(graph, withMirror=True):
+    """
+    Canonical model of a graph with the image of each of its intervals, intervals with the same start and end runs
+    are twins and are matched in any order
+
+    :param graph: a tuple list representing a graph with endpoints 0 to 2 * order - 1
+    :param withMirror: True to give the canonical form, up to mirror, instead of the canonical model
+    :return: the canonical model and the list of the index in it of every interval of graph
+    """
+    if withMirror:
+        last = 2 * len(graph) - 1
+        model = canonicalMapping(graph, False)
+        mirror = canonicalMapping([(last - right, last - left) for left, right in graph], False)
+        return min(model, mirror, key=lambda x: positionFromGraph(x[0]))
+    runs, lengths = endpointRuns(graph)
+    starts = {}
+    for i, (startRun, endRun) in enumerate(runs):
+        starts.setdefault(startRun, []).append((endRun, i))
+    runStart = [0] * len(lengths)
+    for i in range(1, len(lengths)):
+        runStart[i] = runStart[i - 1] + lengths[i - 1]
+    mapping = [0] * len(graph)
+    intervals = [] # (left, end run) in left order
+    for startRun in sorted(starts):
+        for k, (endRun, i) in enumerate(sorted(starts[startRun], key=lambda x: -x[0])):
+            mapping[i] = len(intervals)
+            intervals.append((runStart[startRun] + k, endRun))
+    ended = [0] * len(lengths)
+    canonical = []
+    for left, endRun in intervals:
+        canonical.append((left, runStart[endRun] + ended[endRun]))
+        ended[endRun] += 1
+    return canonical, mapping
+
+
+def canonicalForm(graph):
+    """
+    Canonical form of a graph up to mirror and reordering of endpoints inside their runs, all the models of a class
+    describe isomorphic graphs
+
+    :param graph: a tuple list representing a graph with endpoints 0 to 2 * order - 1
+    :return: the canonical model with the smallest rank between the graph and its mirror
+    """
+    return canonicalMapping(graph)[0]
+
+
+def normalizeGraph(graph):
+    """
+    Normalized model of a graph with any endpoints, the endpoints are replaced by their rank. On a shared endpoint
+    right endpoints come first, so touching intervals stay non adjacent.
+
+    :param graph: a tuple list representing a graph
+    :return: the tuple list with endpoints 0 to 2 * order - 1, in the same order as graph
+    """
+    events = []
+    for i, (left, right) in enumerate(graph):
+        events.append((left, 1, i))
+        events.append((right, 0, i))
+    events.sort()
+    normalized = [[0, 0] for _ in graph]
+    for rank, (_, isLeftEndpoint, i) in enumerate(events):
+        normalized[i][0 if isLeftEndpoint else 1] = rank
+    return [tuple(interval) for interval in normalized]
+
+
+def modelMultiplicity(graph):
+    """
+    Number of normalized models with the same canonical form as graph
+
+    :param graph: a tuple list representing a graph with endpoints 0 to 2 * order - 1
+    :return: the number of models of the class of graph
+    """
+    runs, lengths = endpointRuns(graph)
+    count = 1
+    for length in lengths:
+        count *= factorial(length)
+    twins = {}
+    for pair in runs:
+        twins[pair] = twins.get(pair, 0) + 1
+    for size in twins.values():
+        count //= factorial(size)
+    model = canonicalModel(graph)
+    if model != canonicalModel(mirrorGraph(model)):
+        count *= 2
+    return count
+
+
+def canonicalIntervalGraphs(order):
+    """
+    Generator of one model per canonical form class for an order, in rank order. The enumeration of
+    intervalGraphBruteForceGenerator is cut as soon as a right endpoint breaks the rule of canonicalModel, the
+    mirror is tested on complete models.
+
+    :param order: order of graphs
+    :return: generator of the (graph, number of models of its class)
+    """
+    if order < 1:
+        return
+    length = 2 * order
+    positions = [0]
+    count = [0] * order
+    count[0] = 1
+    opened = 1
+    isLeft = [True] # type of the endpoint of each position
+    run = [0] # run of each position
+    startRun = [0] * order
+    endRun = [-1] * order
+    nextPossibility = 0
+    while True:
+        possibility = None
+        if len(positions) == length:
+            graph = graphFromPosition(positions)
+            if positions <= positionFromGraph(canonicalModel(mirrorGraph(graph))):
+                yield graph, modelMultiplicity(graph)
+        else:
+            maxPossibility = min(opened, order - 1)
+            possibility = nextPossibility
+            while possibility <= maxPossibility:
+                if count[possibility] == 0:
+                    break
+                if count[possibility] == 1:
+                    newRun = run[-1] if not isLeft[-1] else run[-1] + 1
+                    if isLeft[-1] or positions[-1] < possibility: # right endpoints of a run in left order
+                        previous = possibility - 1 # started just before in the same run, must not end earlier
+                        if previous < 0 or startRun[previous] != startRun[possibility] or count[previous] == 1 \
+                                or endRun[previous] == newRun:
+                            break
+                possibility += 1
+            if possibility > maxPossibility:
+                possibility = None
+        if possibility is None:
+            if len(positions) == 1:
+                return
+            last = positions.pop()
+            isLeft.pop()
+            run.pop()
+            count[last] -= 1
+            if count[last] == 0:
+                opened -= 1
+            else:
+                endRun[last] = -1
+            nextPossibility = last + 1
+        else:
+            left = count[possibility] == 0
+            run.append(run[-1] if left == isLeft[-1] else run[-1] + 1)
+            isLeft.append(left)
+            positions.append(possibility)
+            count[possibility] += 1
+            if left:
+                opened += 1
+                startRun[possibility] = run[-1]
+            else:
+                endRun[possibility] = run[-1]
+            nextPossibility = 0
+
+
+def parseShard(text):
+    """
+    Parse a shard given as k/K with 1 <= k <= K
+
+    :param text: the shard text
+    :return: the tuple (k, K)
+    """
+    try:
+        k, shards = (int(x) for x in text.split('/'))
+    except ValueError:
+        raise argparse.ArgumentTypeError("shard must be k/K, got " + text)
+    if not 1 <= k <= shards:
+        raise argparse.ArgumentTypeError("shard must be k/K with 1 <= k <= K, got " + text)
+    return k, shards
+
+
+def readCheckpoint(path, order):
+    """
+    :param path: the checkpoint file
+    :param order: order of the graphs of the run
+    :return: the index of the next graph to check, None if there is no checkpoint
+    """
+    if not os.path.exists(path):
+        return None
+    with open(path) as file:
+        checkpointOrder, index = (int(x) for x in file.read().split())
+    if checkpointOrder != order:
+        raise ValueError("checkpoint " + path + " is for order " + str(checkpointOrder))
+    return index
+
+
+def writeCheckpoint(path, order, index):
+    """
+    Save the index of the next graph to check, the file is replaced atomically
+
+    :param path: the checkpoint file
+    :param order: order of the graphs of the run
+    :param index: the index of the next graph to check
+    """
+    tmp = path + ".tmp"
+    with open(tmp, 'w') as file:
+        file.write(str(order) + " " + str(index) + "\n")
+    os.replace(tmp, path)
+
+
+def enumerationRange(order, shard=None, startIndex=0, checkpoint=None):
+    """
+    Range of graph indices for an exhaustive run
+
+    :param order: order of graphs
+    :param shard: a tuple (k, K) to keep only the k-th of K contiguous parts of the enumeration
+    :param startIndex: the first index to check
+    :param checkpoint: a checkpoint file to resume from
+    :return: the tuple (start, stop) of indices to check
+    """
+    total = intervalGraphCount(order)
+    start, stop = 0, total
+    if shard is not None:
+        k, shards = shard
+        start, stop = (k - 1) * total // shards, k * total // shards
+    start = max(start, startIndex)
+    if checkpoint is not None:
+        resume = readCheckpoint(checkpoint, order)
+        if resume is not None:
+            start = max(start, resume)
+    return min(start, stop), stop
+
+
+def readIntervals(file):
+    """
+    Generator of the intervals of a text file, one "left right" pair per line, blank lines and lines starting with #
+    are skipped
+
+    :param file: an open text file
+    :return: generator of the intervals as tuples of int, or float when an endpoint is not an integer
+    """
+    for line in file:
+        fields = line.split()
+        if not fields or fields[0].startswith('#'):
+            continue
+        interval = []
+        for field in fields[:2]:
+            try:
+                interval.append(int(field))
+            except ValueError:
+                interval.append(float(field))
+        yield tuple(interval)
+
+
+CORPUS_MAGIC = b"QTRDCORP"
+CORPUS_VERSION = 1
+CORPUS_RESULTS = 1 # header flag of a corpus with a value and a labeling per graph
+_CORPUS_HEADER = struct.Struct("<8sIIQQ") # magic, version, flags, number of graphs, number of intervals
+
+
+class CorpusWriter:
+    """
+    Writer of a binary graph corpus, read back by CorpusReader. All the numbers are little endian and the file is:
+
+    - the header: the magic b"QTRDCORP", the version and the flags as uint32, the number of graphs G and the total
+      number of intervals I as uint64
+    - the endpoints: I x 2 int32, the intervals of all the graphs one after the other
+    - the offsets: G + 1 uint64, the intervals of graph i are the rows offsets[i] to offsets[i + 1] - 1 of the endpoints
+    - with the CORPUS_RESULTS flag, the values: G int32, the minimal QTRD value of every graph or -1 if unknown, then
+      the labels: I uint8, the label (0, 1 or 2) of every interval in an optimal solution
+
+    Every section starts on a multiple of 4 bytes so the reader maps the arrays without copy. The graphs are streamed
+    to the file and the header is written on close.
+    """
+
+    def __init__(self, path, withResults=False):
+        """
+        :param path: the corpus file
+        :param withResults: True to store a value and a labeling per graph
+        """
+        self.file = open(path, "wb")
+        self.withResults = withResults
+        self.offsets = [0]
+        self.values = []
+        self.labels = bytearray()
+        self.file.write(bytes(_CORPUS_HEADER.size))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def add(self, graph, solution=None):
+        """
+        Append a graph
+
+        :param graph: a graph
+        :param solution: with results, a minimal QTRD solution of graph or None if unknown
+        """
+        endpoints = np.asarray(list(graph), dtype="<i4").reshape(-1, 2)
+        self.file.write(endpoints.tobytes())
+        self.offsets.append(self.offsets[-1] + len(endpoints))
+        if not self.withResults:
+            return
+        labels = bytearray(len(endpoints))
+        if solution is None:
+            self.values.append(-1)
+        else:
+            ids = {interval: i for i, interval in enumerate(graph)}
+            for label in (1, 2):
+                for interval in solution[label]:
+                    labels[ids[interval]] = label
+            self.values.append(len(solution[1]) + 2 * len(solution[2]))
+        self.labels += labels
+
+    def addArray(self, graphs):
+        """
+        Append graphs of the same order without results, as made by randomIntervalGraphs
+
+        :param graphs: a count x order x 2 array
+        """
+        graphs = np.asarray(graphs, dtype="<i4")
+        count, order = graphs.shape[0], graphs.shape[1]
+        if self.withResults:
+            self.values += [-1] * count
+            self.labels += bytes(count * order)
+        self.file.write(graphs.tobytes())
+        last = self.offsets[-1]
+        self.offsets += range(last + order, last + (count + 1) * order, order) if order else [last] * count
+
+    def close(self):
+        if self.file.closed:
+            return
+        self.file.write(np.asarray(self.offsets, dtype="<u8").tobytes())
+        if self.withResults:
+            self.file.write(np.asarray(self.values, dtype="<i4").tobytes())
+            self.file.write(self.labels)
+        self.file.seek(0)
+        self.file.write(_CORPUS_HEADER.pack(CORPUS_MAGIC, CORPUS_VERSION, CORPUS_RESULTS if self.withResults else 0,
+                                            len(self.offsets) - 1, self.offsets[-1]))
+        self.file.close()
+
+
+class CorpusReader:
+    """
+    Memory mapped reader of a corpus written by CorpusWriter, the arrays are views of the file so opening and scanning
+    a corpus does not copy it
+    """
+
+    def __init__(self, path):
+        """
+        :param path: the corpus file
+        """
+        self.file = open(path, "rb")
+        self.map = None
+        try:
+            if os.fstat(self.file.fileno()).st_size < _CORPUS_HEADER.size:
+                raise ValueError(path + " is not a graph corpus")
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, version, flags, count, intervals = _CORPUS_HEADER.unpack_from(self.map)
+            if magic != CORPUS_MAGIC or version != CORPUS_VERSION:
+                raise ValueError(path + " is not a graph corpus of version " + str(CORPUS_VERSION))
+        except BaseException:
+            self.close() # do not leak the file and the map of a rejected corpus
+            raise
+        offset = _CORPUS_HEADER.size
+        self.endpoints = np.frombuffer(self.map, dtype="<i4", count=2 * intervals, offset=offset).reshape(-1, 2)
+        offset += 8 * intervals
+        self.offsets = np.frombuffer(self.map, dtype="<u8", count=count + 1, offset=offset)
+        offset += 8 * (count + 1)
+        self.hasResults = bool(flags & CORPUS_RESULTS)
+        self.values = None
+        self.labels = None
+        if self.hasResults:
+            self.values = np.frombuffer(self.map, dtype="<i4", count=count, offset=offset)
+            offset += 4 * count
+            self.labels = np.frombuffer(self.map, dtype=np.uint8, count=intervals, offset=offset)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        """
+        :param i: a graph index
+        :return: the tuple list of the i-th graph
+        """
+        return [tuple(interval) for interval in self.array(i).tolist()]
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def array(self, i):
+        """
+        :param i: a graph index
+        :return: the order x 2 endpoints of the i-th graph, a view of the file which stays readable after close
+        """
+        return self.endpoints[self.offsets[i]:self.offsets[i + 1]]
+
+    def solution(self, i):
+        """
+        :param i: a graph index
+        :return: the stored minimal QTRD solution of the i-th graph, None if the corpus has no result for it
+        """
+        if not self.hasResults or self.values[i] < 0:
+            return None
+        solution = {0: [], 1: [], 2: []}
+        graph = self[i]
+        for interval, label in zip(graph, self.labels[self.offsets[i]:self.offsets[i + 1]].tolist()):
+            solution[label].append(interval)
+        return solution
+
+    def close(self):
+        """
+        Close the file. The map can not be closed while a view given by array is still referenced, it is then unmapped
+        when the last view is released.
+        """
+        self.endpoints = self.offsets = self.values = self.labels = None
+        if self.map is not None:
+            try:
+                self.map.close()
+            except BufferError:
+                pass # views are still exported, they keep the map alive
+            self.map = None
+        self.file.close()
 
 
 def graphFromPosition(positions):
@@ -169,23 +1214,34 @@ if __name__ == '__main__':
     parser.add_argument('-a', '--all', dest='allGraph', action='store_true', help='generate all graph from order')
     parser.add_argument('-dt', '--draw-terminal', dest='drawTerminal', action='store_true', help='draw the graph on terminal instead of matplotlib')
     parser.add_argument('-t', '--time', dest='time', action='store_true', help='show the run time')
+    parser.add_argument('--seed', type=int, help='the seed of the random generation')
+    parser.add_argument('--corpus', type=str, help='write the graphs to a corpus file instead of drawing them')
+    parser.add_argument('-n', '--count', type=int, help='with --corpus and without --all, the number of random graphs',
+                        default=1)
+    parser.add_argument('--profile', action='store_true', help='print the time of the generation and of the plotting')
     args = vars(parser.parse_args())
 
+    if args['profile']:
+        profiling.enable()
     start = timeit.default_timer()
-    if args['allGraph']:
-        graphsPos = intervalGraphBruteForceGenerator(args['order'])
-        graphs = []
-        for graphPos in graphsPos:
-            graph = graphFromPosition(graphPos)
-            graphs.append(graph)
+    if args['corpus']:
+        with CorpusWriter(args['corpus']) as writer:
+            if args['allGraph']:
+                for graph in allIntervalGraphs(args['order']):
+                    writer.add(graph)
+            else:
+                rng = np.random.default_rng(args['seed'])
+                for first in range(0, args['count'], 100000):
+                    writer.addArray(randomIntervalGraphs(args['order'], min(100000, args['count'] - first), rng))
+    elif args['allGraph']:
         if args['drawTerminal']:
-            for graph in graphs:
+            for graph in allIntervalGraphs(args['order']):
                 drawGraphTerminal(graph)
         else:
-            for graph in graphs:
+            for graph in allIntervalGraphs(args['order']):
                 drawGraphWindow(graph)
     else:
-        graph = intervalGraphGen(args['order'])
+        graph = intervalGraphGen(args['order'], args['seed'])
         if args['drawTerminal']:
             drawGraphTerminal(graph)
         else:
@@ -193,4 +1249,6 @@ if __name__ == '__main__':
     stop = timeit.default_timer()
     if (args['time']):
         print('Run time : ', stop-start, " sec")
+    if args['profile']:
+        print(profiling.disable().report())
     plt.show()
\ No newline at end of file
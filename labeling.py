@@ -0,0 +1,120 @@
+import numpy as np
+
+import interval_graph
+
+
+class Labeling:
+    """
+    QTRD solution stored as one label (0, 1 or 2) per vertex id of an IntervalGraph in a bytearray, the label of a
+    vertex is read in O(1) and the solution is checked in O(n + m)
+    """
+
+    def __init__(self, graph, labels=None):
+        """
+        :param graph: a graph
+        :param labels: the label of every vertex id, all 0 by default
+        """
+        self.graph = interval_graph.toIntervalGraph(graph)
+        self.labels = bytearray(len(self.graph)) if labels is None else bytearray(labels)
+        if len(self.labels) != len(self.graph):
+            raise ValueError("a labeling needs " + str(len(self.graph)) + " labels, got " + str(len(self.labels)))
+        if self.labels and max(self.labels) > 2:
+            raise ValueError("labels must be 0, 1 or 2")
+
+    @classmethod
+    def fromSolution(cls, graph, solution):
+        """
+        Labeling of a solution in the {0: V0, 1: V1, 2: V2} format, the intervals which are not in graph are ignored.
+        The copies of an interval are labeled by position: its k-th occurrence in the lists labels its k-th copy in
+        graph order, and an occurrence past the last copy labels the last copy again, so an interval in several lists
+        gets the greatest label.
+
+        :param graph: a graph
+        :param solution: a solution
+        :return: the labeling of solution
+        """
+        labeling = cls(graph)
+        positions = labeling.graph.positions
+        used = {} # interval -> number of its occurrences seen
+        labeled = bytearray(len(labeling))
+        for label in range(3):
+            for v in solution[label]:
+                copies = positions.get(v)
+                if copies is not None:
+                    k = used.get(v, 0)
+                    used[v] = k + 1
+                    i = copies[min(k, len(copies) - 1)]
+                    labeling.labels[i] = label
+                    labeled[i] = 1
+        if not all(labeled):
+            raise ValueError(str(labeling.graph[labeled.index(0)]) + " has no label")
+        return labeling
+
+    def toSolution(self):
+        """
+        :return: the solution in the {0: V0, 1: V1, 2: V2} format, each list in graph order
+        """
+        solution = {0: [], 1: [], 2: []}
+        for v, label in zip(self.graph, self.labels):
+            solution[label].append(v)
+        return solution
+
+    def asArray(self):
+        """
+        :return: the labels as a uint8 NumPy array sharing the memory of the labeling
+        """
+        return np.frombuffer(self.labels, dtype=np.uint8)
+
+    def __len__(self):
+        return len(self.labels)
+
+    def __getitem__(self, i):
+        return self.labels[i]
+
+    def __setitem__(self, i, label):
+        if label not in (0, 1, 2):
+            raise ValueError("labels must be 0, 1 or 2")
+        self.labels[i] = label
+
+    def __eq__(self, other):
+        return isinstance(other, Labeling) and self.graph.intervals == other.graph.intervals \
+            and self.labels == other.labels
+
+    def __repr__(self):
+        return "Labeling(" + repr(self.toSolution()) + ")"
+
+    def label(self, v):
+        """
+        :param v: an interval of the graph
+        :return: the label of v
+        """
+        return self.labels[self.graph.index(v)]
+
+    def copy(self):
+        return Labeling(self.graph, self.labels)
+
+    def value(self):
+        """
+        :return: |V1| + 2 * |V2|
+        """
+        return sum(self.labels)
+
+    def isValid(self):
+        """
+        :return: True if every vertex is in V1 or V2 or has a neighbor in V2, and no vertex of V2 is isolated
+        """
+        labels = self.labels
+        for i, neighbors in enumerate(self.graph.adjacency):
+            if labels[i] == 0:
+                if not any(labels[j] == 2 for j in neighbors):
+                    return False
+            elif labels[i] == 2:
+                if not any(labels[j] for j in neighbors):
+                    return False
+        return True
+
+    def check(self):
+        """
+        :return: the value of the labeling if it is a QTRD solution, else -1
+        """
+        return self.value() if self.isValid() else -1
@@ -0,0 +1,214 @@
+import functools
+import inspect
+import os
+import sys
+import time
+
+
+class Stats:
+    """
+    Counters and per phase timers of a profiled run. The time of a phase excludes the time of the phases it calls,
+    so the phases add up to the profiled time.
+    """
+
+    def __init__(self):
+        self.counters = {}
+        self.timers = {}
+        self._stack = [] # [phase, start of the running part] of the phases entered and not exited
+        self.start = time.perf_counter()
+        self.stop = None
+
+    def count(self, name, k=1):
+        self.counters[name] = self.counters.get(name, 0) + k
+
+    def enter(self, phase):
+        now = time.perf_counter()
+        if self._stack:
+            parent = self._stack[-1]
+            self.timers[parent[0]] = self.timers.get(parent[0], 0.0) + now - parent[1]
+        self._stack.append([phase, now])
+
+    def exit(self):
+        now = time.perf_counter()
+        phase, start = self._stack.pop()
+        self.timers[phase] = self.timers.get(phase, 0.0) + now - start
+        if self._stack:
+            self._stack[-1][1] = now
+
+    def total(self):
+        return (self.stop if self.stop is not None else time.perf_counter()) - self.start
+
+    def report(self):
+        """
+        :return: the per phase breakdown and the counters as text
+        """
+        total = self.total()
+        lines = ["{:<20} {:>10} {:>7}".format("phase", "seconds", "share")]
+        phases = dict(self.timers)
+        phases["other"] = max(total - sum(self.timers.values()), 0.0)
+        for phase, seconds in sorted(phases.items(), key=lambda item: -item[1]):
+            lines.append("{:<20} {:>10.4f} {:>6.1f}%".format(phase, seconds, 100 * seconds / total if total else 0))
+        lines.append("{:<20} {:>10.4f}".format("total", total))
+        if self.counters:
+            lines.append("")
+            lines.append("{:<28} {:>12}".format("counter", "calls"))
+            for name, count in sorted(self.counters.items()):
+                lines.append("{:<28} {:>12}".format(name, count))
+        return "\n".join(lines)
+
+
+def _countBatch(stats, function, *args, **kwargs):
+    values = function(*args, **kwargs)
+    stats.count("check_batch candidates", len(values))
+    stats.count("check_batch infeasible", int((values == -1).sum()))
+    return values
+
+
+# (module, attribute, kind, name): a "count" hook counts the calls under name, a "phase" hook times the calls as the
+# phase name and "batch" counts the candidates of check_batch
+HOOKS = [
+    ('interval_graph', 'intervalGraphGen', 'phase', 'generation'),
+    ('interval_graph', 'randomIntervalGraphs', 'phase', 'generation'),
+    ('interval_graph', 'allIntervalGraphs', 'phase', 'generation'),
+    ('interval_graph', 'canonicalIntervalGraphs', 'phase', 'generation'),
+    ('interval_graph', 'drawGraphWindow', 'phase', 'plotting'),
+    ('interval_graph', 'drawGraphTerminal', 'phase', 'plotting'),
+    ('qtrd', 'qtrd_v1', 'phase', 'greedy'),
+    ('qtrd', 'exactSolution', 'phase', 'oracle'),
+    ('qtrd', 'qtrdBruteForce', 'phase', 'oracle'),
+    ('qtrd', 'qtrdChecker', 'count', 'qtrdChecker'),
+    ('qtrd_bounds', 'qtrdLowerBound', 'phase', 'lower bound'),
+    ('qtrd_sweep', 'qtrdSweep', 'phase', 'oracle'),
+    ('qtrd', 'check_batch', 'batch', None),
+    ('qtrd', 'drawWithSolution', 'phase', 'plotting'),
+    ('qtrd_v2', 'connectedGraphs', 'phase', 'component split'),
+    ('qtrd_v2', 'streamComponents', 'phase', 'component split'),
+    ('qtrd_v2', 'connectedQtrd_v2', 'phase', 'DP'),
+    ('qtrd_v2', 'first_option_true', 'count', 'first_option_true'),
+    ('qtrd_v2', 'second_option_true', 'count', 'second_option_true'),
+    ('qtrd_v2', 'third_option_true', 'count', 'third_option_true'),
+    ('qtrd_v2', 'second_option_false', 'count', 'second_option_false'),
+    ('qtrd_v2', 'third_option_false', 'count', 'third_option_false'),
+    ('qtrd_v2', 'updateSolution', 'count', 'DP relaxations'),
+]
+
+_active = None # the Stats of the running profile
+_originals = [] # (owner, attribute, original) of the patched functions
+
+
+def _modules(name):
+    """
+    :param name: a module name
+    :return: the loaded modules with this name, the script run as __main__ included
+    """
+    modules = []
+    if name in sys.modules:
+        modules.append(sys.modules[name])
+    main = sys.modules.get('__main__')
+    if main is not None and os.path.splitext(os.path.basename(getattr(main, '__file__', None) or ''))[0] == name:
+        modules.append(main)
+    return modules
+
+
+def _wrap(stats, function, kind, name):
+    if kind == 'batch':
+        return functools.partial(_countBatch, stats, function)
+    if kind == 'count':
+        @functools.wraps(function)
+        def counted(*args, **kwargs):
+            stats.count(name)
+            return function(*args, **kwargs)
+        return counted
+    if inspect.isgeneratorfunction(function):
+        @functools.wraps(function)
+        def timedGenerator(*args, **kwargs):
+            generator = function(*args, **kwargs)
+            while True:
+                stats.enter(name)
+                try:
+                    item = next(generator)
+                except StopIteration:
+                    return
+                finally:
+                    stats.exit()
+                yield item
+        return timedGenerator
+
+    @functools.wraps(function)
+    def timed(*args, **kwargs):
+        stats.enter(name)
+        try:
+            return function(*args, **kwargs)
+        finally:
+            stats.exit()
+    return timed
+
+
+def enable(stats=None):
+    """
+    Start a profile: the hot path functions of the loaded modules are replaced by counting and timing wrappers. The
+    functions are only replaced while a profile runs, so the instrumentation costs nothing when it is off. Only the
+    calls made in this process are seen, worker processes started before are not profiled.
+
+    :param stats: the Stats to fill, a new one if None
+    :return: the Stats of the profile
+    """
+    global _active
+    if _active is not None:
+        disable()
+    _active = stats if stats is not None else Stats()
+    for moduleName, attribute, kind, name in HOOKS:
+        for module in _modules(moduleName):
+            owner = module
+            path = attribute.split('.')
+            for part in path[:-1]:
+                owner = getattr(owner, part)
+            original = getattr(owner, path[-1], None)
+            if original is None:
+                continue
+            _originals.append((owner, path[-1], original))
+            setattr(owner, path[-1], _wrap(_active, original, kind, name))
+    return _active
+
+
+def disable():
+    """
+    Stop the running profile and put the original functions back
+
+    :return: the Stats of the profile, None if no profile was running
+    """
+    global _active
+    while _originals:
+        owner, attribute, original = _originals.pop()
+        setattr(owner, attribute, original)
+    stats, _active = _active, None
+    if stats is not None:
+        stats.stop = time.perf_counter()
+    return stats
+
+
+def count(name, k=1):
+    """
+    Add k to a counter of the running profile, for the counts a solver keeps in local variables and reports once per
+    call. Nothing is done when no profile runs.
+
+    :param name: the counter name
+    :param k: the number to add
+    """
+    if _active is not None:
+        _active.count(name, k)
+
+
+def profiled(function, *args, **kwargs):
+    """
+    Run a function under a profile
+
+    :param function: a solver or any function of the loaded modules
+    :return: the result of the call and its Stats
+    """
+    stats = enable()
+    try:
+        result = function(*args, **kwargs)
+    finally:
+        disable()
+    return result, stats
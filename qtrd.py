@@ -1,13 +1,21 @@
 #!/usr/bin/env python3
 
 import argparse
+import functools
+import multiprocessing
 import os.path
-import random
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 
+import numpy as np
 from matplotlib import pyplot as plt
+from tqdm import tqdm
 
 import interval_graph
 import itertools
+import profiling
+import qtrd_bounds
+import qtrd_cache
+from labeling import Labeling
 
 
 def dominated(graph, v, V1, V2):
@@ -19,11 +27,12 @@ def dominated(graph, v, V1, V2):
     :param V2: a list of V2 intervals
     :return: True if v is dominated by V1 union V2 in graph
     """
-    if v in V1 + V2:
+    graph = interval_graph.toIntervalGraph(graph)
+    if v in V1 or v in V2:
         return True
     else:
         for u in V2:
-            if v in interval_graph.neighbor(graph, u):
+            if graph.adjacent(u, v):
                 return True
     return False
 
@@ -38,8 +47,9 @@ def isolated(graph, v, V1, V2):
     :param V2: a list of V2 intervals
     :return: True if v is isolated by V1 union V2 in graph
     """
-    for u in interval_graph.neighbor(graph, v):
-        if u in V1 + V2:
+    graph = interval_graph.toIntervalGraph(graph)
+    for u in graph.neighbors(v):
+        if u in V1 or u in V2:
             return False
     return True
 
@@ -52,7 +62,7 @@ def v2InNeighborhood(graph, v, V2):
     :param V2: a list of V2 intervals
     :return: a list of neighbor of v that are also in V2
     """
-    neighbor = interval_graph.neighbor(graph, v)
+    neighbor = interval_graph.toIntervalGraph(graph).neighbors(v)
     res = []
     for interval in neighbor:
         if interval in V2:
@@ -60,58 +70,84 @@ def v2InNeighborhood(graph, v, V2):
     return res
 
 
-def qtrd_v1_u(graph, v, alreadyDominated):
+def qtrd_v1_u(graph, v, nonDominated):
     """
     Get the u for the first version of QTRD. u is a neighbor of v that have the most non dominated neighbor. if
     conflicted, u is the interval which has the most neighbor
 
-    :param graph: a graph :param v: an interval :param alreadyDominated: a list of dominated intervals in graph
-    :return: the u corresponding to the neighbor of v with the most non dominated neighbor and the most neighbor in
-    conflict
+    :param graph: an IntervalGraph
+    :param v: an interval id
+    :param nonDominated: for every interval id, its number of closed neighbor not dominated by V2
+    :return: the id of u corresponding to the neighbor of v with the most non dominated neighbor and the most neighbor
+    in conflict
     """
+    adjacency = graph.adjacency
     u = v
-    closedNeighbor = interval_graph.closedNeighbor(graph,v)
-    for neighbor in closedNeighbor:
-        nonDominatedNeighbor = set(interval_graph.closedNeighbor(graph,neighbor)) - set(alreadyDominated)
-        if len(nonDominatedNeighbor) > len(set(interval_graph.closedNeighbor(graph,u)) - set(alreadyDominated)):
+    for neighbor in adjacency[v] + [v]:
+        if nonDominated[neighbor] > nonDominated[u]:
             u = neighbor
-        elif len(nonDominatedNeighbor) == len(set(interval_graph.closedNeighbor(graph, u)) - set(alreadyDominated)):
-            if len(interval_graph.closedNeighbor(graph,neighbor)) > len(interval_graph.closedNeighbor(graph,u)):
+        elif nonDominated[neighbor] == nonDominated[u]:
+            if len(adjacency[neighbor]) > len(adjacency[u]):
                 u = neighbor
     return u
 
 
-def qtrd_v1(graph):
+def qtrd_v1(graph, asLabeling=False):
     """
-    First version of the QTRD algorithm not proved
+    First version of the QTRD algorithm not proved. For every interval the greedy keeps its label, if it is dominated
+    by V2, its number of closed neighbor not dominated by V2 and its number of neighbor in V2, and only updates them
+    around a new V2 interval, so it runs in O(n log n + m).
 
     :param graph: a graph
+    :param asLabeling: True to return a Labeling instead of the {0: V0, 1: V1, 2: V2} format
     :return: the qtrd solution for the graph
     """
-    res = {0: graph.copy(), 1: [], 2: []}
-    sorted_graph = sorted(graph, key=lambda x: x[1]) # sort by right growing
-    sorted_graph = sorted(sorted_graph, key=lambda x: len(interval_graph.closedNeighbor(graph, x))) # sort by neighborhood growing
-    already_dominated = []
+    graph = interval_graph.toIntervalGraph(graph)
+    n = len(graph)
+    adjacency = graph.adjacency
+    labels = bytearray(n)
+    dominatedByV2 = bytearray(n)
+    nonDominated = [len(adjacency[i]) + 1 for i in range(n)]
+    v2Neighbors = [0] * n
+    v1, v2 = [], []
+    sorted_graph = sorted(range(n), key=lambda i: graph[i][1]) # sort by right growing
+    sorted_graph = sorted(sorted_graph, key=lambda i: len(adjacency[i])) # sort by neighborhood growing
 
     for interval in sorted_graph:
-        if not dominated(graph, interval, res[1], res[2]):
-            u = qtrd_v1_u(graph, interval, already_dominated)
+        if labels[interval] == 0 and not dominatedByV2[interval]:
+            u = qtrd_v1_u(graph, interval, nonDominated)
             # if length of non dominated neighborhood of u >= 3 - number of v2 in u neighborhood
-            if len(set(interval_graph.closedNeighbor(graph, u)) - set(already_dominated)) >= 3 - len(v2InNeighborhood(graph, u, res[2])):
-                res[2].append(u)
-                res[0].remove(u)
-                already_dominated.extend(interval for interval in interval_graph.closedNeighbor(graph, u))
+            if nonDominated[u] >= 3 - v2Neighbors[u]:
+                if labels[u] != 0:
+                    raise ValueError(str(graph[u]) + " is already in V1")
+                labels[u] = 2
+                v2.append(u)
+                for w in adjacency[u]:
+                    v2Neighbors[w] += 1
+                for w in adjacency[u] + [u]:
+                    if not dominatedByV2[w]:
+                        dominatedByV2[w] = 1
+                        for x in adjacency[w] + [w]:
+                            nonDominated[x] -= 1
             else:
-                res[1].append(interval)
-                res[0].remove(interval)
-
-    res[2] = sorted(res[2], key=lambda x: x[1])
-    for v in res[2]:
-        if isolated(graph, v, res[1], res[2]):
-            u = max(interval_graph.neighbor(graph, v), key=lambda x: x[1])
-            res[1].append(u)
-            res[0].remove(u)
-    return res
+                labels[interval] = 1
+                v1.append(interval)
+
+    support = [0] * n # number of neighbor in V1 union V2
+    for i in v1 + v2:
+        for w in adjacency[i]:
+            support[w] += 1
+    v2 = sorted(v2, key=lambda i: graph[i][1])
+    for v in v2:
+        if support[v] == 0:
+            u = max(adjacency[v], key=lambda i: graph[i][1])
+            labels[u] = 1
+            v1.append(u)
+            for w in adjacency[u]:
+                support[w] += 1
+    if asLabeling:
+        return Labeling(graph, labels)
+    return {0: [graph[i] for i in range(n) if labels[i] == 0], 1: [graph[i] for i in v1], 2: [graph[i] for i in v2]}
 
 
 def qtrdChecker(graph, solution):
@@ -119,44 +155,333 @@ def qtrdChecker(graph, solution):
     Check a QTRD solution for a graph
 
     :param graph: a graph
-    :param solution: a solution to check
+    :param solution: a solution to check, as a Labeling of graph or in the {0: V0, 1: V1, 2: V2} format
     :return: True if solution is a solution of QTRD for the graph
     """
-    v0, v1, v2 = solution[0], solution[1], solution[2]
-    qtrdNumber = len(v1) + 2 * len(v2)
-    for interval in graph:
-        if interval not in v0 + v1 + v2:
-            return -1
-        if not dominated(graph, interval, v1, v2):
-            return -1
-    for v in v2:
-        if isolated(graph, v, v1, v2):
-            return -1
-    return qtrdNumber
+    if isinstance(solution, Labeling):
+        return solution.check()
+    try:
+        labeling = Labeling.fromSolution(graph, solution)
+    except ValueError:
+        return -1
+    if not labeling.isValid():
+        return -1
+    return len(solution[1]) + 2 * len(solution[2])
+
+
+BATCH_SIZE = 1 << 15 # number of labelings checked by one matrix product
+
+
+def check_batch(graph, labels_matrix, adjacency=None):
+    """
+    Check many labelings of a graph at once. For a block of rows, the products of the V2 and V1 union V2 indicator
+    matrices with the adjacency matrix give the number of neighbor in V2 and in V1 union V2 of every vertex, so a
+    block costs two matrix products instead of one Python loop per labeling.
+
+    :param graph: a graph
+    :param labels_matrix: a k x n matrix, row i is the label (0, 1 or 2) of every vertex id for the i-th labeling, a
+    ValueError is raised for any other label as in Labeling
+    :param adjacency: the adjacency matrix of graph, built from graph if None
+    :return: an int array of the k values, -1 for the rows which are not a QTRD solution
+    """
+    graph = interval_graph.toIntervalGraph(graph)
+    labels_matrix = np.asarray(labels_matrix)
+    if labels_matrix.ndim != 2 or labels_matrix.shape[1] != len(graph):
+        raise ValueError("labels_matrix must be a k x " + str(len(graph)) + " matrix")
+    if labels_matrix.size and (labels_matrix.min() < 0 or labels_matrix.max() > 2 or
+                               (labels_matrix.dtype.kind not in 'biu' and np.any(labels_matrix % 1))):
+        raise ValueError("labels must be 0, 1 or 2")
+    if adjacency is None:
+        adjacency = graph.adjacencyMatrix()
+    values = np.empty(len(labels_matrix), dtype=np.int64)
+    for start in range(0, len(labels_matrix), BATCH_SIZE):
+        labels = labels_matrix[start:start + BATCH_SIZE]
+        v2 = labels == 2
+        occupied = labels > 0
+        v2Neighbors = v2.astype(adjacency.dtype) @ adjacency
+        occupiedNeighbors = occupied.astype(adjacency.dtype) @ adjacency
+        valid = np.all(occupied | (v2Neighbors > 0), axis=1) & np.all(~v2 | (occupiedNeighbors > 0), axis=1)
+        values[start:start + len(labels)] = np.where(valid, labels.sum(axis=1, dtype=np.int64), -1)
+    return values
+
+
+def labelingBlock(order, start, stop):
+    """
+    Labelings of rank start to stop - 1 in the itertools.product([0, 1, 2], repeat=order) order
+
+    :param order: the number of vertices
+    :param start: the rank of the first labeling
+    :param stop: the rank after the last labeling
+    :return: a (stop - start) x order uint8 matrix of labels
+    """
+    ranks = np.arange(start, stop, dtype=np.int64)
+    powers = 3 ** np.arange(order - 1, -1, -1, dtype=np.int64)
+    return ((ranks[:, None] // powers) % 3).astype(np.uint8)
 
 
-def qtrdBruteForce(graph):
+def qtrdBruteForce(graph, asLabeling=False):
     """
-    Try all the possibilities for QTRD and keep the minimum value based of solution = 2 * |V2| + |V1|
+    Try all the possibilities for QTRD and keep the minimum value based of solution = 2 * |V2| + |V1|. The
+    possibilities are checked by blocks with check_batch, in the itertools.product order so the first minimal solution
+    is kept.
 
     :param graph: a graph
+    :param asLabeling: True to return a Labeling instead of the {0: V0, 1: V1, 2: V2} format
     :return: the minimal QTRD solution for the graph
     """
+    graph = interval_graph.toIntervalGraph(graph)
+    n = len(graph)
+    adjacency = graph.adjacencyMatrix()
+    minSolution = Labeling(graph)
+    minSolutionValue = float("inf")
+    for start in range(0, 3 ** n, BATCH_SIZE):
+        labels = labelingBlock(n, start, min(start + BATCH_SIZE, 3 ** n))
+        values = check_batch(graph, labels, adjacency)
+        values[values == -1] = np.iinfo(values.dtype).max
+        best = int(np.argmin(values))
+        if values[best] < minSolutionValue:
+            minSolutionValue = values[best]
+            minSolution = Labeling(graph, labels[best].tobytes())
+    return minSolution if asLabeling else minSolution.toSolution()
+
+
+def qtrdBruteForceGray(graph):
+    """
+    Try all the possibilities for QTRD like qtrdBruteForce, walked in reflected ternary Gray code order so only one
+    label changes between two candidates. The closed neighborhoods are bitmasks: cover[i] is the union of the
+    neighborhoods of the V2 among the vertices i to n - 1, rebuilt from i down when the label of i enters or leaves
+    V2, which happens less often for higher i, so a candidate is dominated when V1 | V2 | cover is the full mask. The
+    three labels of the first vertex are tried at each step of the Gray code of the other vertices. The V2 isolation
+    test is an AND with the V1 union V2 mask, and is only made for dominated candidates better than the best one.
+
+    :param graph: a graph
+    :return: the minimal QTRD solution for the graph
+    """
+    graph = interval_graph.toIntervalGraph(graph)
+    n = len(graph)
     minSolution = {0: [], 1: [], 2: []}
+    if n == 0:
+        return minSolution
+    adjacency = graph.adjacency
+    neighborMask = [sum(1 << j for j in adjacency[i]) for i in range(n)]
+    full = (1 << n) - 1
+    labels = [0] * n
+    directions = [1] * n
+    cover = [0] * (n + 1)
+    value = 0 # value of the vertices 1 to n - 1
+    v1Mask = 0
+    v2Mask = 0
+    firstCandidates = [(0, 0, 0, 0), (1, 1, 0, 0), (2, 0, 1, neighborMask[0])] # label, V1 bit, V2 bit, cover
+    minLabels = None
     minSolutionValue = float("inf")
-    possibilities = itertools.product([0, 1, 2], repeat=len(graph))
-    for possibility in possibilities:
-        solution = {0: [], 1: [], 2: []}
-        type = list(possibility)
-        for i in range(len(graph)):
-            solution[type[i]].append(graph[i])
-        value = qtrdChecker(graph, solution)
-        if value != -1 and value < minSolutionValue:
-            minSolutionValue = value
-            minSolution = solution
+    while True:
+        for first, v1Bit, v2Bit, firstCover in firstCandidates:
+            if value + first >= minSolutionValue:
+                break
+            occupied = v1Mask | v2Mask | v1Bit | v2Bit
+            if occupied | cover[1] | firstCover != full:
+                continue
+            remaining = v2Mask | v2Bit
+            while remaining:
+                low = remaining & -remaining
+                if not neighborMask[low.bit_length() - 1] & occupied:
+                    break
+                remaining ^= low
+            if not remaining:
+                minSolutionValue = value + first
+                minLabels = labels.copy()
+                minLabels[0] = first
+                break
+        i = 1
+        while i < n and not 0 <= labels[i] + directions[i] <= 2:
+            directions[i] = -directions[i]
+            i += 1
+        if i >= n:
+            break
+        old = labels[i]
+        new = labels[i] = old + directions[i]
+        bit = 1 << i
+        value += new - old
+        if old == 0 or new == 0: # 0 <-> 1
+            v1Mask ^= bit
+        else: # 1 <-> 2
+            v1Mask ^= bit
+            v2Mask ^= bit
+            for j in range(i, 0, -1):
+                cover[j] = cover[j + 1] | neighborMask[j] if labels[j] == 2 else cover[j + 1]
+    if minLabels is not None:
+        for i in range(n):
+            minSolution[minLabels[i]].append(graph[i])
     return minSolution
 
 
+def qtrdBranchAndBound(graph, asLabeling=False):
+    """
+    Exact QTRD by branch and bound. The intervals are labeled in right growing order, an interval is checked as soon
+    as its whole closed neighborhood is labeled: it must be dominated and, if in V2, not isolated. A branch is also
+    cut when its value plus a lower bound on the cost of dominating the remaining vertices reaches the best solution.
+    Connected components are consecutive in right growing order and are solved one after the other, a component is
+    not searched when the qtrd_v1 solution meets its lower bound. The search keeps its own stack, so large components
+    do not reach the recursion limit.
+
+    :param graph: a graph
+    :param asLabeling: True to return a Labeling instead of the {0: V0, 1: V1, 2: V2} format
+    :return: a minimal QTRD solution for the graph
+    """
+    graph = interval_graph.toIntervalGraph(graph)
+    n = len(graph)
+    adjacency = graph.adjacency
+    order = sorted(range(n), key=lambda i: graph[i][1])
+    position = [0] * n
+    for k, i in enumerate(order):
+        position[i] = k
+    closing = [[] for _ in range(n)] # closing[k]: intervals whose closed neighborhood is labeled at position k
+    for i in range(n):
+        closing[max([position[j] for j in adjacency[i]] + [position[i]])].append(i)
+    components = [] # (first, last + 1) positions of the connected components
+    first = 0
+    reach = 0
+    for k in range(n):
+        for j in adjacency[order[k]]:
+            reach = max(reach, position[j])
+        if reach <= k:
+            components.append((first, k + 1))
+            first = k + 1
+            reach = k + 1
+    cover = [1] * (n + 1) # cover[k]: largest closed neighborhood labeled from position k in its component
+    for first, end in components:
+        for k in range(end - 1, first - 1, -1):
+            cover[k] = max(cover[k + 1] if k + 1 < end else 1, len(adjacency[order[k]]) + 1)
+
+    labels = [0] * n
+    domination = [0] * n # number of V2 in the closed neighborhood, plus one if in V1
+    support = [0] * n # number of neighbor in V1 union V2
+    undominated = [0]
+    pruned = [0] # labels cut by the bound or the closed neighborhood test, for the profile
+
+    initial = qtrd_v1(graph, asLabeling=True)
+    initialLabels = list(initial.labels) if initial.isValid() else [1] * n
+    bestLabels = initialLabels.copy()
+    bestValue = [0]
+
+    def dominate(i, step):
+        domination[i] += step
+        if step > 0 and domination[i] == 1:
+            undominated[0] -= 1
+        elif step < 0 and domination[i] == 0:
+            undominated[0] += 1
+
+    def label(i, value, step):
+        labels[i] = value if step > 0 else 0
+        dominate(i, step)
+        for j in adjacency[i]:
+            support[j] += step
+            if value == 2:
+                dominate(j, step)
+
+    def lowerBound(k, end):
+        if k == end or cover[k] <= 2:
+            return undominated[0]
+        return -(-2 * undominated[0] // cover[k])
+
+    def search(first, end):
+        # depth first search with an explicit stack: choice[k] is the next label to try at position k, applied[k] the
+        # label set on order[k] and value[k] the value of the positions first to k - 1
+        choice = [0] * (n + 1)
+        applied = [0] * (n + 1)
+        value = [0] * (n + 1)
+        k = first
+        while True:
+            if k == end:
+                if value[k] < bestValue[0]:
+                    bestValue[0] = value[k]
+                    for j in range(first, end):
+                        bestLabels[order[j]] = labels[order[j]]
+                k -= 1
+                continue
+            i = order[k]
+            if applied[k]:
+                label(i, applied[k], -1)
+                applied[k] = 0
+            if choice[k] == 3:
+                if k == first:
+                    return
+                k -= 1
+                continue
+            current = choice[k]
+            choice[k] += 1
+            if current:
+                label(i, current, 1)
+                applied[k] = current
+            feasible = value[k] + current + lowerBound(k + 1, end) < bestValue[0]
+            if feasible:
+                for j in closing[k]:
+                    if domination[j] == 0 or labels[j] == 2 and support[j] == 0:
+                        feasible = False
+                        break
+            if feasible:
+                value[k + 1] = value[k] + current
+                k += 1
+                choice[k] = 0
+            else:
+                pruned[0] += 1
+
+    for first, end in components:
+        undominated[0] = end - first
+        bestValue[0] = sum(initialLabels[order[k]] for k in range(first, end))
+        if bestValue[0] > qtrd_bounds.componentLowerBound([len(adjacency[order[k]]) for k in range(first, end)]):
+            search(first, end)
+    profiling.count("branch and bound pruned", pruned[0])
+    solution = Labeling(graph, bestLabels)
+    return solution if asLabeling else solution.toSolution()
+
+
+_resultCache = None
+ORACLES = {'branch-and-bound': 'qtrdBranchAndBound', 'brute-force': 'qtrdBruteForce', 'gray': 'qtrdBruteForceGray'}
+_oracle = 'branch-and-bound' # key of ORACLES, the solver used by exactSolution
+
+
+def useOracle(name):
+    """
+    Set the exact solver used by exactSolution in this process
+
+    :param name: a key of ORACLES
+    """
+    global _oracle
+    if name not in ORACLES:
+        raise ValueError("unknown oracle " + str(name) + ", expected one of " + ", ".join(ORACLES))
+    _oracle = name
+
+
+def useResultCache(path, maxEntries=1000000):
+    """
+    Set the result cache used by exactSolution in this process
+
+    :param path: the SQLite database file, None to stop using a cache
+    :param maxEntries: the maximal number of graphs stored
+    """
+    global _resultCache
+    _resultCache = qtrd_cache.ResultCache(path, maxEntries) if path else None
+
+
+def exactSolution(graph):
+    """
+    Minimal QTRD solution from the result cache when it is set and has the graph, else from the oracle set by
+    useOracle, qtrdBranchAndBound by default
+
+    :param graph: a graph
+    :return: a minimal QTRD solution for the graph
+    """
+    oracle = globals()[ORACLES[_oracle]] # looked up at each call so a profile sees the call
+    if _resultCache is None:
+        return oracle(graph)
+    solution = _resultCache.get(graph)
+    if solution is None:
+        solution = oracle(graph)
+        _resultCache.put(graph, solution)
+    return solution
+
+
 def drawWithSolution(solution, title="QTRD Solution"):
     """
     Configure the plot for a QTRD solution
@@ -179,64 +504,420 @@ def drawWithSolution(solution, title="QTRD Solution"):
     interval_graph.drawGraphWindow(v0 + v1 + v2, colors, labels, title)
 
 
-def counter_example(graph, saveExample=False):
+oracleCounts = {'skipped': 0, 'solved': 0} # graphs of checkGraph certified by the lower bound or solved exactly
+
+
+def certified(graph, value, *values):
     """
-    Compare the first version of QTRD algorithm to the Brute Force
+    Test if an algorithm value is optimal because it meets qtrd_bounds.qtrdLowerBound, and count it in oracleCounts
 
     :param graph: a graph
-    :return: True if QTRDV1 solution is minimal
+    :param value: the value of a QTRD solution of the graph
+    :param values: other values of the same solution, as the one returned by the algorithm and the one of qtrdChecker,
+    which must all be equal to value
+    :return: True if the solution is minimal, False if the exact solver is needed
+    """
+    if all(other == value for other in values) and value == qtrd_bounds.qtrdLowerBound(graph):
+        oracleCounts['skipped'] += 1
+        return True
+    oracleCounts['solved'] += 1
+    return False
+
+
+def checkGraph(graph, exact=None, bound=True):
+    """
+    Compare the first version of QTRD algorithm to the exact solver, without any output so it can run in a worker
+
+    :param graph: a graph
+    :param exact: a known minimal QTRD solution for the graph, None to solve it
+    :param bound: True to skip the exact solver when the algorithm value meets the lower bound
+    :return: None if QTRDV1 solution is minimal, else the counter example (graph, algorithm solution, algorithm value,
+    exact solution, exact value)
     """
+    graph = interval_graph.toIntervalGraph(graph)
     qtrd = qtrd_v1(graph)
     qtrdValue = qtrdChecker(graph, qtrd)
-    bruteForce = qtrdBruteForce(graph)
+    if exact is None and bound and certified(graph, qtrdValue):
+        return None
+    bruteForce = exact if exact is not None else exactSolution(graph)
     bruteForceValue = qtrdChecker(graph, bruteForce)
     if qtrdValue != bruteForceValue:
-        print(graph)
-        print("QTRD value from algorithm : ", qtrdValue, "\n", qtrd)
-        print("QTRD value from brute force :", bruteForceValue, "\n", bruteForce)
-        drawWithSolution(qtrd, "QTRD from Algorithm")
-        path = "qtrdv1/"
-        if saveExample and not os.path.exists(path):
-            os.makedirs(path)
-        if saveExample:
-            plt.savefig(path+"algo_"+saveExample)
-            print("Algorithm solution for counter example saved at : \"", path, "algo_", saveExample, "\"")
-        drawWithSolution(bruteForce, "QTRD from brute force")
-        if saveExample:
-            plt.savefig(path+"bruteforce_"+saveExample)
-            print("Brute force solution for counter example saved at : \"", path, "bruteforce_", saveExample, "\"")
-        plt.show()
+        return graph.intervals, qtrd, qtrdValue, bruteForce, bruteForceValue
+    return None
+
+
+def reportCounterExample(counterExample, saveExample=False, path="qtrdv1/"):
+    """
+    Print and plot a counter example found by checkGraph
+
+    :param counterExample: the counter example
+    :param saveExample: the name to save the plots with, False to only show them
+    :param path: the directory to save the plots in
+    """
+    graph, qtrd, qtrdValue, bruteForce, bruteForceValue = counterExample
+    print(graph)
+    print("QTRD value from algorithm : ", qtrdValue, "\n", qtrd)
+    print("QTRD value from brute force :", bruteForceValue, "\n", bruteForce)
+    drawWithSolution(qtrd, "QTRD from Algorithm")
+    if saveExample and not os.path.exists(path):
+        os.makedirs(path)
+    if saveExample:
+        plt.savefig(path+"algo_"+saveExample)
+        print("Algorithm solution for counter example saved at : \"", path, "algo_", saveExample, "\"")
+    drawWithSolution(bruteForce, "QTRD from brute force")
+    if saveExample:
+        plt.savefig(path+"bruteforce_"+saveExample)
+        print("Brute force solution for counter example saved at : \"", path, "bruteforce_", saveExample, "\"")
+    plt.show()
+
+
+def memoizedExactSolution(memo, graph, solve=None):
+    """
+    Exact solution through an in memory memo keyed like the result cache, so the graphs of a canonical form class are
+    solved once
+
+    :param memo: a dict, filled with the canonical labels of the solved graphs
+    :param graph: a graph
+    :param solve: the exact solver, exactSolution if None
+    :return: a minimal QTRD solution for the graph
+    """
+    key, mapping = qtrd_cache.cacheKey(graph)
+    labels = memo.get(key)
+    if labels is not None:
+        return qtrd_cache.solutionFromLabels(graph, labels, mapping)
+    solution = (solve or exactSolution)(graph)
+    memo[key] = qtrd_cache.canonicalLabels(graph, solution, mapping)
+    return solution
+
+
+def mergeEndpoints(graph, p):
+    """
+    Merge the endpoints p and p + 1 of a normalized model and normalize it again. When p is a left endpoint and p + 1
+    the right endpoint of another interval, the two intervals only touch afterwards so their edge is removed.
+
+    :param graph: a normalized tuple list
+    :param p: a position
+    :return: the new normalized tuple list, None if p and p + 1 are the endpoints of the same interval
+    """
+    if (p, p + 1) in graph:
+        return None
+    return interval_graph.normalizeGraph([tuple(p if x == p + 1 else x for x in interval) for interval in graph])
+
+
+def minimizeCounterExample(check, graph, solve=None):
+    """
+    Shrink a counter example by delta debugging: delete chunks of intervals of halving size, then merge consecutive
+    endpoints, and keep a reduction only if check still fails on it, until no reduction fails. The results of check
+    and of the exact solver are memoized so no graph is checked or solved twice.
+
+    :param check: the function comparing an algorithm to the exact solver, as checkGraph
+    :param graph: a graph on which check fails
+    :param solve: the exact solver check compares to, exactSolution if None
+    :return: the counter example of check on a locally minimal failing graph
+    """
+    results = {}
+    oracle = {}
+
+    def fails(candidate):
+        key = tuple(candidate)
+        if key not in results:
+            results[key] = check(candidate, memoizedExactSolution(oracle, candidate, solve)) if candidate else None
+        return results[key] is not None
+
+    graph = interval_graph.normalizeGraph(graph)
+    if not fails(graph):
+        raise ValueError(str(graph) + " is not a counter example")
+    reduced = True
+    while reduced:
+        reduced = False
+        chunk = len(graph) // 2
+        while chunk >= 1:
+            i = 0
+            while i < len(graph):
+                candidate = interval_graph.normalizeGraph(graph[:i] + graph[i + chunk:])
+                if fails(candidate):
+                    graph = candidate
+                    reduced = True
+                else:
+                    i += chunk
+            chunk //= 2
+        for p in range(2 * len(graph) - 1):
+            candidate = mergeEndpoints(graph, p)
+            if candidate is not None and candidate != graph and fails(candidate):
+                graph = candidate
+                reduced = True
+                break
+    return results[tuple(graph)]
+
+
+def counter_example(graph, saveExample=False, minimize=False):
+    """
+    Compare the first version of QTRD algorithm to the Brute Force
+
+    :param graph: a graph
+    :param saveExample: the name to save the plots with, False to only show them
+    :param minimize: True to report a locally minimal counter example found by minimizeCounterExample
+    :return: True if QTRDV1 solution is minimal
+    """
+    counterExample = checkGraph(graph)
+    if counterExample is not None:
+        if minimize:
+            counterExample = minimizeCounterExample(checkGraph, counterExample[0])
+        reportCounterExample(counterExample, saveExample)
         return False
     return True
 
 
-if __name__ == '__main__':
-    parser = argparse.ArgumentParser(description='Compare QTRD function value with Brute Force on interval graph')
+_stopEvent = None
+
+
+def _initWorker(stopEvent, cache, oracle):
+    global _stopEvent
+    _stopEvent = stopEvent
+    useResultCache(*cache)
+    useOracle(oracle)
+
+
+def _checkChunk(check, graphs):
+    """
+    Work unit of searchCounterExample, stops when any worker found a counter example
+
+    :return: the number of graphs checked, the counter example or None and the oracleCounts of the chunk
+    """
+    counts = dict(oracleCounts)
+    for count, graph in enumerate(graphs):
+        if _stopEvent.is_set():
+            return count, None, {key: oracleCounts[key] - counts[key] for key in counts}
+        counterExample = check(graph)
+        if counterExample is not None:
+            _stopEvent.set()
+            return count, counterExample, {key: oracleCounts[key] - counts[key] for key in counts}
+    return len(graphs), None, {key: oracleCounts[key] - counts[key] for key in counts}
+
+
+def searchCounterExample(check, graphs, jobs=1, chunkSize=64, total=None, onProgress=None):
+    """
+    Run check on the graphs until a counter example is found. With more than one job the graphs are sent by chunks to
+    a process pool and the first counter example stops all the workers, the other results are dropped.
+
+    :param check: a picklable function of a graph returning a counter example or None
+    :param graphs: an iterable of graphs
+    :param jobs: the number of worker processes, 1 to check in this process
+    :param chunkSize: the number of graphs of a work unit
+    :param total: the number of graphs for the progress bar
+    :param onProgress: called with the number of leading graphs all checked after each work unit
+    :return: the number of leading graphs all checked and the counter example or None
+    """
+    graphs = iter(graphs)
+    checked = 0
+    bar = tqdm(total=total)
+    try:
+        if jobs <= 1:
+            for graph in graphs:
+                counterExample = check(graph)
+                bar.update(1)
+                if counterExample is not None:
+                    return checked, counterExample
+                checked += 1
+                if onProgress is not None and checked % chunkSize == 0:
+                    onProgress(checked)
+            return checked, None
+
+        counterExample = None
+        pending = {} # future -> (chunk number, chunk size)
+        finished = {} # chunk number -> (graphs checked, chunk size)
+        submitted = 0
+        head = 0 # first chunk not counted in checked
+        blocked = False # a chunk was not fully checked, checked can not grow anymore
+        stopEvent = multiprocessing.Event()
+        cache = (_resultCache.path, _resultCache.maxEntries) if _resultCache is not None else (None,)
+        with ProcessPoolExecutor(jobs, initializer=_initWorker, initargs=(stopEvent, cache, _oracle)) as pool:
+            while True:
+                while counterExample is None and len(pending) < 2 * jobs:
+                    chunk = list(itertools.islice(graphs, chunkSize))
+                    if not chunk:
+                        break
+                    pending[pool.submit(_checkChunk, check, chunk)] = (submitted, len(chunk))
+                    submitted += 1
+                if not pending:
+                    break
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    number, size = pending.pop(future)
+                    count, example, counts = future.result()
+                    for key in counts:
+                        oracleCounts[key] += counts[key]
+                    bar.update(count)
+                    finished[number] = (count, size)
+                    if example is not None and counterExample is None:
+                        counterExample = example
+                while head in finished and not blocked:
+                    count, size = finished.pop(head)
+                    checked += count
+                    blocked = count < size
+                    head += 1
+                if onProgress is not None:
+                    onProgress(checked)
+        return checked, counterExample
+    finally:
+        bar.close()
+
+
+def addSearchArguments(parser):
+    """
+    Add the arguments of the counter example search to a command line parser
+
+    :param parser: an argparse parser
+    """
     parser.add_argument('-s', '--samples', type=int, help='the samples number', default=1)
     parser.add_argument('-o', '--order', type=int, help='the graphs order for the generation, no value --> randomly '
                                                         'generated', default=-1)
     parser.add_argument('-se', '--saveExample', type=str, dest='saveExample', help='save with the name the counter '
                                                                                    'example if exist')
-    args = vars(parser.parse_args())
+    parser.add_argument('--shard', type=interval_graph.parseShard, help='with --order, check only the k-th of K '
+                                                                        'contiguous parts of the graphs, as k/K')
+    parser.add_argument('--start-index', type=int, dest='startIndex', help='with --order, index of the first graph '
+                                                                           'to check', default=0)
+    parser.add_argument('--checkpoint', type=str, help='with --order, file to resume from and to save the index of '
+                                                       'the next graph to check')
+    parser.add_argument('-j', '--jobs', type=int, help='the number of worker processes', default=1)
+    parser.add_argument('--cache', type=str, help='SQLite file of exact results to read before solving and to fill')
+    parser.add_argument('--cache-size', type=int, dest='cacheSize', help='the maximal number of graphs in the cache',
+                        default=1000000)
+    parser.add_argument('--oracle', choices=list(ORACLES), default='branch-and-bound', help='the exact solver, '
+                                                                                            'gray is the brute force '
+                                                                                            'in Gray code order')
+    parser.add_argument('-c', '--canonical', action='store_true', help='with --order, check one graph per canonical '
+                                                                       'form instead of every model')
+    parser.add_argument('--seed', type=int, help='without --order, the seed of the random graphs')
+    parser.add_argument('--no-lower-bound', dest='noLowerBound', action='store_true', help='always run the exact '
+                                                                                         'solver, even when the '
+                                                                                         'algorithm meets the lower '
+                                                                                         'bound')
+    parser.add_argument('-m', '--minimize', action='store_true', help='shrink the counter example to a locally '
+                                                                      'minimal one before reporting it')
+    parser.add_argument('--profile', action='store_true', help='print the time of every phase and the hot path '
+                                                               'counters, only the work of this process is seen so '
+                                                               'use it with -j 1')
+    parser.add_argument('--corpus', type=str, help='check the graphs of a corpus file, its stored solutions are used '
+                                                   'as the exact ones')
+    parser.add_argument('--solve-corpus', type=str, dest='solveCorpus', help='with --corpus, write the corpus with '
+                                                                             'the exact solution of every graph to '
+                                                                             'this file instead of checking it')
+
+
+def _checkStored(check, item):
+    """
+    Work unit of a corpus with results, check a graph against its stored solution
 
-    cpt = 1
+    :param check: a function of a graph and its exact solution, as checkGraph
+    :param item: the graph and its stored solution or None
+    :return: the counter example or None
+    """
+    graph, solution = item
+    return check(graph, solution)
 
-    if args['order'] < 1:
-        for i in range(args['samples']):
-            order = random.randint(1, 9)
-            graph = interval_graph.intervalGraphGen(order)
-            if not counter_example(graph, args['saveExample']):
-                break
-            print("TEST ", cpt, " SUCCESSFUL")
-            cpt += 1
+
+def solveCorpus(corpus, path, solve=None):
+    """
+    Write a copy of a corpus with the exact solution of every graph, the stored solutions are kept
+
+    :param corpus: a CorpusReader
+    :param path: the new corpus file
+    :param solve: the exact solver, exactSolution if None
+    """
+    with interval_graph.CorpusWriter(path, withResults=True) as writer:
+        for i in tqdm(range(len(corpus))):
+            solution = corpus.solution(i)
+            graph = corpus[i]
+            writer.add(graph, solution if solution is not None else (solve or exactSolution)(graph))
+
+
+def runSearch(check, args, minOrder, maxOrder, solve=None, generate=None):
+    """
+    Counter example search of the command line, on random graphs, on all the graphs of an order or on a corpus file
+
+    :param check: the function comparing an algorithm to the exact solver, as checkGraph
+    :param args: the parsed arguments of addSearchArguments
+    :param minOrder: the minimal order of random graphs
+    :param maxOrder: the maximal order of random graphs
+    :param solve: the exact solver check compares to, exactSolution if None
+    :param generate: the function of an order and a NumPy Generator drawing the random graphs, intervalGraphGen if
+    None
+    :return: the counter example or None
+    """
+    if args['profile']:
+        profiling.enable()
+    try:
+        return _runSearch(check, args, minOrder, maxOrder, solve, generate or interval_graph.intervalGraphGen)
+    finally:
+        if args['profile']:
+            print(profiling.disable().report())
+
+
+def _runSearch(check, args, minOrder, maxOrder, solve, generate):
+    useResultCache(args['cache'], args['cacheSize'])
+    useOracle(args['oracle'])
+    if args['noLowerBound']:
+        check = functools.partial(check, bound=False)
+    checkGraphs = check
+    for key in oracleCounts:
+        oracleCounts[key] = 0
+    if args['corpus']:
+        with interval_graph.CorpusReader(args['corpus']) as corpus:
+            if args['solveCorpus']:
+                solveCorpus(corpus, args['solveCorpus'], solve)
+                return None
+            if corpus.hasResults:
+                graphs = ((corpus[i], corpus.solution(i)) for i in range(len(corpus)))
+                check = functools.partial(_checkStored, check)
+            else:
+                graphs = iter(corpus)
+            _, counterExample = searchCounterExample(check, graphs, args['jobs'], total=len(corpus))
+    elif args['order'] < 1:
+        rng = np.random.default_rng(args['seed'])
+        graphs = (generate(int(rng.integers(minOrder, maxOrder + 1)), rng) for _ in range(args['samples']))
+        _, counterExample = searchCounterExample(check, graphs, args['jobs'], total=args['samples'])
+    elif args['canonical']:
+        if args['shard'] or args['startIndex'] or args['checkpoint']:
+            raise ValueError("--canonical can not be used with --shard, --start-index or --checkpoint")
+        represented = [0]
+
+        def canonicalGraphs():
+            for graph, multiplicity in interval_graph.canonicalIntervalGraphs(args['order']):
+                represented[0] += multiplicity
+                yield graph
+
+        _, counterExample = searchCounterExample(check, canonicalGraphs(), args['jobs'])
+        print("Checked graphs represent", represented[0], "of the", interval_graph.intervalGraphCount(args['order']),
+              "models")
     else:
-        graphsPos = interval_graph.intervalGraphBruteForceGenerator(args['order'])
-        graphs = []
-        for graphPos in graphsPos:
-            graph = interval_graph.graphFromPosition(graphPos)
-            graphs.append(graph)
-        for graph in graphs:
-            if not counter_example(graph, args['saveExample']):
-                break
-            print("TEST ", cpt, " SUCCESSFUL")
-            cpt += 1
\ No newline at end of file
+        order = args['order']
+        checkpoint = args['checkpoint']
+        start, stop = interval_graph.enumerationRange(order, args['shard'], args['startIndex'], checkpoint)
+        onProgress = None
+        if checkpoint:
+            onProgress = lambda checked: interval_graph.writeCheckpoint(checkpoint, order, start + checked)
+        checked, counterExample = searchCounterExample(check, interval_graph.allIntervalGraphs(order, start, stop),
+                                                       args['jobs'], chunkSize=256, total=stop - start,
+                                                       onProgress=onProgress)
+        if checkpoint:
+            interval_graph.writeCheckpoint(checkpoint, order, start + checked)
+    total = oracleCounts['skipped'] + oracleCounts['solved']
+    if total:
+        print("Exact solver skipped by the lower bound for", oracleCounts['skipped'], "of", total, "graphs ({:.1f}%)"
+              .format(100 * oracleCounts['skipped'] / total))
+    if counterExample is not None:
+        if args['minimize']:
+            order = len(counterExample[0])
+            counterExample = minimizeCounterExample(checkGraphs, counterExample[0], solve)
+            print("Counter example shrunk from", order, "to", len(counterExample[0]), "intervals")
+        reportCounterExample(counterExample, args['saveExample'])
+    return counterExample
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare QTRD function value with Brute Force on interval graph')
+    addSearchArguments(parser)
+    args = vars(parser.parse_args())
+    runSearch(checkGraph, args, 1, 9)
@@ -0,0 +1,59 @@
+import interval_graph
+
+
+def componentLowerBound(degrees):
+    """
+    Lower bound of the QTRD value of a connected graph from its degrees. With no V2 every vertex is in V1. With k V2
+    vertices the vertices they do not dominate are in V1, and every V2 needs a neighbor in V1 or V2:
+    - one V2 of degree d dominates d + 1 vertices and its neighbor in V1 is one of them, so n - d vertices are in V1
+    - two V2 dominate at most d1 + d2 vertices if they are adjacent, else d1 + d2 + 2 but one of them is in V1
+    - k V2 dominate at most the sum of their degrees plus k vertices
+
+    :param degrees: the degree of every vertex of the connected graph
+    :return: a lower bound of its QTRD value
+    """
+    n = len(degrees)
+    if n <= 2:
+        return n
+    degrees = sorted(degrees, reverse=True)
+    bound = n
+    dominated = 0
+    for k in range(1, n + 1):
+        dominated += degrees[k - 1] + 1
+        if k == 1:
+            v1 = n - degrees[0]
+        elif k == 2:
+            v1 = max(0, n - degrees[0] - degrees[1] - 1)
+        else:
+            v1 = max(0, n - dominated)
+        bound = min(bound, v1 + 2 * k)
+        if v1 == 0:
+            break
+    return bound
+
+
+def qtrdLowerBound(graph):
+    """
+    Lower bound of the QTRD value of a graph, the sum of componentLowerBound over its connected components. It runs in
+    O(n log n + m) and is reached by the optimal value on most random graphs, so a solution of this value is optimal
+    without solving the graph.
+
+    :param graph: a graph
+    :return: a lower bound of the QTRD value of the graph
+    """
+    graph = interval_graph.toIntervalGraph(graph)
+    adjacency = graph.adjacency
+    seen = bytearray(len(graph))
+    bound = 0
+    for start in range(len(graph)):
+        if seen[start]:
+            continue
+        seen[start] = 1
+        component = [start]
+        for v in component:
+            for u in adjacency[v]:
+                if not seen[u]:
+                    seen[u] = 1
+                    component.append(u)
+        bound += componentLowerBound([len(adjacency[v]) for v in component])
+    return bound
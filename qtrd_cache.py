@@ -0,0 +1,116 @@
+import sqlite3
+
+import interval_graph
+
+
+def cacheKey(graph):
+    """
+    Key of a graph in the result cache, the position list of its canonical form
+
+    :param graph: a graph
+    :return: the key and the index in the canonical form of every interval of graph
+    """
+    canonical, mapping = interval_graph.canonicalMapping(interval_graph.normalizeGraph(graph))
+    return ",".join(str(p) for p in interval_graph.positionFromGraph(canonical)), mapping
+
+
+def canonicalLabels(graph, solution, mapping):
+    """
+    :param graph: a graph
+    :param solution: a QTRD solution for the graph
+    :param mapping: the index in the canonical form of every interval of graph, as given by cacheKey
+    :return: the labels of the solution in the canonical form order, as a string of 0, 1 and 2
+    """
+    labels = ["0"] * len(mapping)
+    for i, interval in enumerate(graph):
+        labels[mapping[i]] = "1" if interval in solution[1] else "2" if interval in solution[2] else "0"
+    return "".join(labels)
+
+
+def solutionFromLabels(graph, labels, mapping):
+    """
+    :param graph: a graph
+    :param labels: the labels of a solution in the canonical form order, as made by canonicalLabels
+    :param mapping: the index in the canonical form of every interval of graph, as given by cacheKey
+    :return: the solution for graph
+    """
+    solution = {0: [], 1: [], 2: []}
+    for i, interval in enumerate(graph):
+        solution[int(labels[mapping[i]])].append(interval)
+    return solution
+
+
+class ResultCache:
+    """
+    On disk store of exact QTRD results in SQLite. A graph is stored under its canonical form with its optimal value and
+    one optimal labeling of the canonical form, so every model of the class hits the same entry. Past maxEntries the
+    least recently used entries are removed.
+    """
+
+    def __init__(self, path, maxEntries=1000000):
+        """
+        :param path: the SQLite database file
+        :param maxEntries: the maximal number of graphs stored
+        """
+        self.path = path
+        self.maxEntries = maxEntries
+        self.connection = sqlite3.connect(path, timeout=60)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value INTEGER NOT NULL, "
+                                "labels TEXT NOT NULL, used INTEGER NOT NULL)")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS results_used ON results (used)")
+        self.connection.commit()
+        self.size = self.connection.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        self.hits = 0
+        self.misses = 0
+
+    def _clock(self):
+        return self.connection.execute("SELECT COALESCE(MAX(used), 0) + 1 FROM results").fetchone()[0]
+
+    def get(self, graph):
+        """
+        :param graph: a graph
+        :return: a minimal QTRD solution for the graph, None if it is not stored
+        """
+        key, mapping = cacheKey(graph)
+        row = self.connection.execute("SELECT labels FROM results WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        with self.connection:
+            self.connection.execute("UPDATE results SET used = ? WHERE key = ?", (self._clock(), key))
+        return solutionFromLabels(graph, row[0], mapping)
+
+    def put(self, graph, solution):
+        """
+        Store a minimal QTRD solution of a graph
+
+        :param graph: a graph
+        :param solution: a minimal QTRD solution for the graph
+        """
+        key, mapping = cacheKey(graph)
+        value = len(solution[1]) + 2 * len(solution[2])
+        with self.connection:
+            inserted = self.connection.execute("INSERT OR IGNORE INTO results VALUES (?, ?, ?, ?)",
+                                               (key, value, canonicalLabels(graph, solution, mapping),
+                                                self._clock())).rowcount
+        self.size += inserted
+        if self.size > self.maxEntries:
+            self.evict()
+
+    def evict(self):
+        """
+        Remove the least recently used entries over maxEntries
+        """
+        with self.connection:
+            self.size = self.connection.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+            excess = self.size - self.maxEntries
+            if excess > 0:
+                self.connection.execute("DELETE FROM results WHERE key IN "
+                                        "(SELECT key FROM results ORDER BY used LIMIT ?)", (excess,))
+                self.size -= excess
+
+    def close(self):
+        self.connection.close()
@@ -0,0 +1,116 @@
+from bisect import bisect_left, bisect_right
+
+import qtrd_v2
+from labeling import Labeling
+
+
+class Component:
+    """
+    A connected component of a DynamicQtrd with its span, the union of its intervals, and its qtrd_v2 solution. The
+    intervals are kept as inserted, connectedQtrd_v2 solves their normalized model so they can share endpoints.
+    """
+
+    def __init__(self, intervals):
+        """
+        :param intervals: the intervals of a connected graph
+        """
+        self.intervals = intervals
+        self.left = min(v[0] for v in intervals)
+        self.right = max(v[1] for v in intervals)
+        self.solution, self.value = qtrd_v2.connectedQtrd_v2(intervals)
+
+
+class DynamicQtrd:
+    """
+    QTRD solution of a graph maintained under insertions and deletions of intervals. The graph is kept as its connected
+    components sorted by span, their spans are disjoint so a bisection finds the components an interval touches. An
+    update only solves again the components it changes: an insertion merges the components overlapping the new interval
+    and a deletion splits the component of the removed interval, so its cost depends on the size of these components
+    and not on the size of the graph.
+    """
+
+    def __init__(self, graph=()):
+        """
+        :param graph: the initial graph
+        """
+        self.components = [Component(subgraph) for subgraph in qtrd_v2.connectedGraphs(list(graph))]
+        self.components.sort(key=lambda component: component.left)
+        self.lefts = [component.left for component in self.components]
+        self.rights = [component.right for component in self.components]
+        self.total = sum(component.value for component in self.components)
+
+    def __len__(self):
+        return sum(len(component.intervals) for component in self.components)
+
+    def _replace(self, start, stop, components):
+        """
+        Replace the components start to stop - 1 by components, sorted by span and between their neighbors
+
+        :param start: the index of the first replaced component
+        :param stop: the index after the last replaced component
+        :param components: the new components
+        """
+        self.total += sum(component.value for component in components)
+        self.total -= sum(component.value for component in self.components[start:stop])
+        self.components[start:stop] = components
+        self.lefts[start:stop] = [component.left for component in components]
+        self.rights[start:stop] = [component.right for component in components]
+
+    def insert(self, interval):
+        """
+        Add an interval to the graph, the components it overlaps are merged with it and solved again
+
+        :param interval: a tuple (left, right) with left < right, not already in the graph, its endpoints can be
+        endpoints of other intervals
+        """
+        left, right = interval
+        if not left < right:
+            raise ValueError("the interval " + str(interval) + " is empty")
+        start = bisect_right(self.rights, left) # first component ending after left
+        stop = bisect_left(self.lefts, right) # after the last component starting before right
+        intervals = [tuple(interval)]
+        for component in self.components[start:stop]:
+            if intervals[0] in component.intervals:
+                raise ValueError("the interval " + str(interval) + " is already in the graph")
+            intervals.extend(component.intervals)
+        self._replace(start, max(start, stop), [Component(intervals)])
+
+    def delete(self, interval):
+        """
+        Remove an interval from the graph, its component is split into the connected components left and they are
+        solved again
+
+        :param interval: an interval of the graph
+        """
+        left, right = interval
+        k = bisect_right(self.lefts, left) - 1
+        if k < 0 or tuple(interval) not in self.components[k].intervals:
+            raise ValueError("the interval " + str(interval) + " is not in the graph")
+        intervals = list(self.components[k].intervals)
+        intervals.remove(tuple(interval))
+        self._replace(k, k + 1, [Component(subgraph) for subgraph in qtrd_v2.connectedGraphs(intervals)])
+
+    def value(self):
+        """
+        :return: the value of the QTRD solution of the graph
+        """
+        return self.total
+
+    def graph(self):
+        """
+        :return: the intervals of the graph, component by component in span order
+        """
+        return [v for component in self.components for v in component.intervals]
+
+    def labeling(self, asLabeling=False):
+        """
+        :param asLabeling: True to return a Labeling of graph() instead of the {0: V0, 1: V1, 2: V2} format
+        :return: the QTRD solution of the graph
+        """
+        solution = {0: [], 1: [], 2: []}
+        for component in self.components:
+            for i in range(3):
+                solution[i].extend(component.solution[i])
+        if asLabeling:
+            return Labeling.fromSolution(self.graph(), solution)
+        return solution
@@ -0,0 +1,223 @@
+import argparse
+import functools
+from bisect import bisect_left
+
+import interval_graph
+import qtrd
+import qtrd_v2
+from labeling import Labeling
+
+NONE = -1 # no interval of the set is open
+
+
+class Staircase:
+    """
+    Points (x, y) of which none is dominated by another, x growing and y decreasing, to test in O(log k) if a point is
+    dominated by one of them
+    """
+
+    def __init__(self):
+        self.xs = []
+        self.ys = []
+
+    def dominates(self, x, y):
+        """
+        :return: True if a point has x and y greater or equal to the ones given
+        """
+        p = bisect_left(self.xs, x)
+        return p < len(self.xs) and self.ys[p] >= y
+
+    def add(self, x, y):
+        """
+        Add a point which is not dominated and remove the points it dominates
+        """
+        stop = bisect_left(self.xs, x)
+        if stop < len(self.xs) and self.xs[stop] == x:
+            stop += 1
+        start = stop
+        while start > 0 and self.ys[start - 1] <= y:
+            start -= 1
+        self.xs[start:stop] = [x]
+        self.ys[start:stop] = [y]
+
+
+def sweepEvents(graph):
+    """
+    Endpoints of the intervals of a graph in sweep order, the right endpoints first on a shared position so touching
+    intervals are not adjacent, as in IntervalGraph. The empty intervals have no neighbor and no event.
+
+    :param graph: a graph
+    :return: the list of (position, 1 for a left endpoint else 0, interval id) and the event index of every right
+    endpoint
+    """
+    events = []
+    for i, (left, right) in enumerate(graph):
+        if left < right:
+            events.append((left, 1, i))
+            events.append((right, 0, i))
+    events.sort()
+    end = {}
+    for k, (_, start, i) in enumerate(events):
+        if not start:
+            end[i] = k
+    return events, end
+
+
+def pruneStates(states, infinity):
+    """
+    Keep the states which are not dominated. A state (r2, r12, u0, u2) is better when each of its values is greater, as
+    an open interval of V2 or V1 U V2 which ends later dominates or supports more of the next intervals and a later
+    deadline leaves more choices, so a state dominated by a state of lower or equal cost can not lead to a better
+    solution. The states have three kinds:
+    - no open V2: u2 is infinity, the values are r12 and u0
+    - an open V2 which has a neighbor in V1 U V2: u0 and u2 are infinity, the values are r2 and r12
+    - an open V2 without such a neighbor: it is the only open interval of V1 U V2, the value is r2 = r12 = u2
+
+    :param states: the dict of state -> (cost, labels)
+    :param infinity: the deadline of a state without deadline
+    :return: the dict of the states which are not dominated
+    """
+    order = sorted(states, key=lambda state: (states[state][0], state[0] == NONE, state[3] != infinity,
+                                              -state[0], -state[1], -state[2]))
+    withoutV2 = Staircase()
+    supported = Staircase()
+    maxSupportedR12 = NONE - 1
+    maxR2 = NONE
+    kept = {}
+    for state in order:
+        r2, r12, u0, u2 = state
+        if r2 != NONE and u2 == infinity:
+            if supported.dominates(r2, r12):
+                continue
+            supported.add(r2, r12)
+            maxSupportedR12 = max(maxSupportedR12, r12)
+            maxR2 = max(maxR2, r2)
+        elif r2 != NONE:
+            if maxR2 >= r2:
+                continue
+            maxR2 = r2
+        else:
+            if maxSupportedR12 >= r12 or withoutV2.dominates(r12, u0):
+                continue
+            withoutV2.add(r12, u0)
+        kept[state] = states[state]
+    return kept
+
+
+def relax(states, state, cost, labels):
+    if state not in states or cost < states[state][0]:
+        states[state] = (cost, labels)
+
+
+def qtrdSweep(graph, asLabeling=False):
+    """
+    Exact QTRD solver by a sweep over the endpoints, independent of the other solvers. At a position of the sweep, the
+    open intervals form a clique and every next interval adjacent to an open interval v starts before the right of v,
+    so the future only depends on:
+    - r2, the greatest right endpoint of an open V2, which dominates the next intervals starting before it
+    - r12, the greatest right endpoint of an open interval of V1 U V2, which supports the next V2 starting before it
+    - u0, the smallest right endpoint of an open V0 not dominated yet, a V2 must start before it
+    - u2, the smallest right endpoint of an open V2 without neighbor in V1 U V2 yet, a V1 or V2 must start before it
+    Each value is an event index, NONE or infinity. A left endpoint labels its interval 0, 1 or 2 from every state, a
+    right endpoint drops the states whose deadline it is, and only the states which are not dominated are kept. There
+    are a few of them at every position, so the sweep runs in O(n log n) for the sort of the endpoints and about O(n)
+    after.
+
+    :param graph: a graph
+    :param asLabeling: True to return a Labeling instead of the {0: V0, 1: V1, 2: V2} format
+    :return: a minimal QTRD solution for the graph and its value
+    """
+    graph = list(graph)
+    events, end = sweepEvents(graph)
+    infinity = len(events)
+    # labels is a linked list (interval id, label, labels before) of the intervals in V1 U V2
+    states = {(NONE, NONE, infinity, infinity): (0, None)}
+    for k, (_, start, i) in enumerate(events):
+        following = {}
+        if start:
+            r = end[i]
+            for (r2, r12, u0, u2), (cost, labels) in states.items():
+                relax(following, (r2, r12, min(u0, r) if r2 == NONE else u0, u2), cost, labels)
+                relax(following, (r2, max(r12, r), u0, infinity), cost + 1, (i, 1, labels))
+                relax(following, (max(r2, r), max(r12, r), infinity, infinity if r12 != NONE else r), cost + 2,
+                      (i, 2, labels))
+            following = pruneStates(following, infinity)
+        else:
+            for (r2, r12, u0, u2), (cost, labels) in states.items():
+                if u0 == k or u2 == k:
+                    continue
+                relax(following, (NONE if r2 == k else r2, NONE if r12 == k else r12, u0, u2), cost, labels)
+        states = following
+    cost, labels = states[(NONE, NONE, infinity, infinity)]
+    label = [0] * len(graph)
+    while labels is not None:
+        i, label[i], labels = labels
+    for i, (left, right) in enumerate(graph):
+        if not left < right:
+            label[i] = 1 # no neighbor to dominate or support it
+            cost += 1
+    if asLabeling:
+        return Labeling(graph, label), cost
+    solution = {0: [], 1: [], 2: []}
+    for v, l in zip(graph, label):
+        solution[l].append(v)
+    return solution, cost
+
+
+def sweepSolution(graph):
+    """
+    :param graph: a graph
+    :return: the minimal QTRD solution of qtrdSweep, the exact solver of the search in this module
+    """
+    return qtrdSweep(graph)[0]
+
+
+def sparseGraph(degree, order, rng):
+    """
+    :param degree: the expected average degree
+    :param order: the graph order
+    :param rng: a NumPy Generator
+    :return: a random graph of densityGraphGen with this average degree
+    """
+    return interval_graph.densityGraphGen(order, degree / max(order - 1, 1), rng)
+
+
+def checkGraph(graph, exact=None, bound=True):
+    """
+    Compare the second version of QTRD algorithm to the sweep solver, without any output so it can run in a worker.
+    The sweep costs less than the lower bound, which builds the adjacency, so it always runs and bound is ignored.
+
+    :param graph: a graph
+    :param exact: a known minimal QTRD solution for the graph, None to solve it
+    :param bound: unused, for the signature of the other checkGraph
+    :return: None if QTRDV2 solution is minimal, else the counter example (graph, algorithm solution, algorithm value,
+    exact solution, exact value)
+    """
+    qtrd_sol, qtrdValue = qtrd_v2.qtrd_v2(graph)
+    if exact is not None:
+        sweep, sweepValue = exact, qtrd.qtrdChecker(graph, exact)
+    else:
+        sweep, sweepValue = qtrdSweep(graph)
+    if qtrdValue != sweepValue:
+        return list(graph), qtrd_sol, qtrdValue, sweep, sweepValue
+    return None
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare QTRD function value with the sweep solver on large interval '
+                                                 'graphs')
+    qtrd.addSearchArguments(parser)
+    parser.add_argument('--sizes', nargs=2, type=int, metavar=('MIN', 'MAX'), default=[1000, 10000],
+                        help='without --order, the minimal and maximal order of the random graphs')
+    parser.add_argument('--degree', type=float, default=4.0, help='without --order, the expected average degree of '
+                                                                  'the random graphs')
+    args = vars(parser.parse_args())
+    # the sweep replaces the exact solver, the options of the exact solver do not apply
+    if args['cache']:
+        parser.error("--cache is not used, the sweep solver is not cached")
+    if args['noLowerBound']:
+        parser.error("--no-lower-bound is not used, the sweep solver always runs")
+    if args['oracle'] != 'branch-and-bound':
+        parser.error("--oracle is not used, the exact solver is the sweep solver")
+    qtrd.runSearch(checkGraph, args, args['sizes'][0], args['sizes'][1], sweepSolution,
+                   functools.partial(sparseGraph, args['degree']))
@@ -1,12 +1,10 @@
 import argparse
-import os.path
-import random
-
-import matplotlib.pyplot as plt
-from tqdm import tqdm
+from bisect import bisect_right
 
 import interval_graph
+import profiling
 import qtrd
+from labeling import Labeling
 
 
 def removeMultiple(list, *elem):
@@ -16,217 +14,286 @@ def removeMultiple(list, *elem):
     return res
 
 
-def rightGrowingSort(graph):
-    sorted_graph = sorted(graph, key=lambda x: x[1])
-    return sorted_graph
-
-
-def firstNonDominated(graph, v):
-    tab = list(filter(lambda x: v[1] < x[0], graph))
-    return min(tab, key=lambda x: x[1], default=None)
-
-
-def secondNonDominated(graph, v):
-    u = firstNonDominated(graph, v)
-    tab = list(filter(lambda x: v[1] < x[0], graph))
-    tab.remove(u)
-    return min(tab, key=lambda x: x[1], default=None)
-
-
-def thirdNonDominated(graph, v):
-    u = firstNonDominated(graph, v)
-    w = secondNonDominated(graph, v)
-    tab = list(filter(lambda x: v[1] < x[0], graph))
-    tab.remove(u)
-    tab.remove(w)
-    return min(tab, key=lambda x: x[1], default=None)
-
-
-def greaterClosedNeighbor(graph, v):
-    neighbors = interval_graph.closedNeighbor(graph, v)
-    return max(neighbors, key=lambda x: x[1])
-
-
-def firstVertex(graph):
-    return min(graph, key=lambda x: x[1])
-
-
-def lastVertex(graph):
-    return max(graph, key=lambda x: x[1])
+class ComponentIndex:
+    """
+    Integer tables of a connected graph for the DP. The intervals are renumbered 1 to n by right growing order, 0 is
+    the initial state, and every query of the DP is a list lookup.
+    """
 
+    def __init__(self, graph):
+        """
+        :param graph: a connected graph
+        """
+        self.graph = list(graph)
+        n = len(self.graph)
+        order = sorted(range(n), key=lambda i: self.graph[i][1]) # right growing, graph order on ties
+        self.intervals = [None] + [self.graph[i] for i in order]
+        self.left = [0] + [v[0] for v in self.intervals[1:]]
+        self.right = [0] + [v[1] for v in self.intervals[1:]]
+        self.rank = [0] * n # rank of every interval of graph
+        for k, i in enumerate(order):
+            self.rank[i] = k + 1
+        self.last = self.rank[max(range(n), key=lambda i: self.graph[i][1])] if n else 0
+
+        # first, second and third intervals by right growing order among the ones starting after the right of v
+        byLeft = sorted(range(1, n + 1), key=lambda k: self.left[k])
+        lefts = [self.left[k] for k in byLeft]
+        suffix = [()] * (n + 1)
+        for p in range(n - 1, -1, -1):
+            suffix[p] = tuple(sorted(suffix[p + 1] + (byLeft[p],))[:3])
+        self.first = [None] * (n + 1)
+        self.second = [None] * (n + 1)
+        self.third = [None] * (n + 1)
+        for v in range(n + 1):
+            candidates = suffix[bisect_right(lefts, self.right[v]) if v else 0] + (None, None, None)
+            self.first[v], self.second[v], self.third[v] = candidates[:3]
+
+        # closed neighbor with the greatest right, neighbors in graph order first and v last on ties. Every interval
+        # starting before the right of v and ending after it is a neighbor of v, so it is the best of a prefix in left
+        # growing order, keeping the two best to skip v itself.
+        key = [(self.right[k], -order[k - 1]) if k else None for k in range(n + 1)]
+        self.greater = list(range(n + 1))
+        best = [] # two best of the prefix
+        p = 0
+        for v in sorted(range(1, n + 1), key=lambda k: self.right[k]):
+            while p < n and lefts[p] < self.right[v]:
+                best = sorted(best + [byLeft[p]], key=lambda k: key[k], reverse=True)[:2]
+                p += 1
+            if not best:
+                continue
+            u = best[0]
+            if u == v and len(best) > 1 and self.right[best[1]] == self.right[v]:
+                u = best[1]
+            self.greater[v] = u
+
+    def closed_adjacent(self, u, v):
+        """
+        :param u: a rank
+        :param v: a rank
+        :return: True if u is in the closed neighborhood of v, the initial state 0 has no neighbor
+        """
+        if u == v:
+            return True
+        if u == 0 or v == 0:
+            return False
+        return max(self.left[u], self.left[v]) < min(self.right[u], self.right[v])
+
+
+def updateSolution(sol, preV, preB, newV, newB, addedV1, addedV2):
+    sol[newB][newV] = (preV, preB, addedV1, addedV2)
+
+
+def buildSolution(index, sol, v, b):
+    """
+    Rebuild the solution of a DP state by walking its predecessor pointers back to the initial state
 
-def updateSolution(sol, preV, preB, newV, newB, addedV):
-    preSol = sol[preV, preB].copy()
-    newSol = {0: preSol[0].copy(), 1: preSol[1].copy(), 2: preSol[2].copy()}
-    for i in range(3):
-        for c in addedV[i]:
-            newSol[i].append(c)
-            newSol[0].remove(c)
-    sol[newV, newB] = newSol
+    :param index: the ComponentIndex of a connected graph
+    :param sol: the predecessor state and the added vertices of each reached state
+    :param v: the rank of the state
+    :param b: the boolean of the state
+    :return: the solution of the state, V0 in graph order and V1, V2 in order of addition
+    """
+    edges = []
+    while sol[b][v] is not None:
+        v, b, addedV1, addedV2 = sol[b][v]
+        edges.append((addedV1, addedV2))
+    if v != 0 or not b:
+        return {0: [], 1: [], 2: []}
+    res = {0: [], 1: [], 2: []}
+    added = [False] * len(index.intervals) # by rank, so equal intervals are told apart
+    for addedV1, addedV2 in reversed(edges):
+        res[1].extend(index.intervals[u] for u in addedV1)
+        res[2].extend(index.intervals[u] for u in addedV2)
+        for u in addedV1 + addedV2:
+            added[u] = True
+    res[0] = [u for i, u in enumerate(index.graph) if not added[index.rank[i]]]
+    return res
 
 
-def first_option_true(graph, v, opt, sol):
-    i1 = firstNonDominated(graph, v)
+def first_option_true(index, v, opt, sol):
+    i1 = index.first[v]
     if i1 is not None:
-        i12 = secondNonDominated(graph, v)
+        i12 = index.second[v]
         if i12 is not None:
-            w = thirdNonDominated(graph, v)
+            w = index.third[v]
             if w is not None:
-                pass
                 if w != i12:
-                    i22 = greaterClosedNeighbor(graph, i12)
-                    if i22 != i12 and i22 not in interval_graph.closedNeighbor(graph,i1):
-                        if opt[i22, True] > opt[v, True] + 4:
-                            opt[i22, True] = opt[v, True] + 4
-                            updateSolution(sol, v, True, i22, True, {0: [], 1: [i1, i12], 2: [i22]})
-                    i2 = greaterClosedNeighbor(graph, w)
-                    if i2 not in interval_graph.closedNeighbor(graph, i1):
-                        if i2 not in interval_graph.closedNeighbor(graph, i12):
-                            if opt[i2, False] > opt[v, True] + 4:
-                                opt[i2, False] = opt[v, True] + 4
-                                updateSolution(sol, v, True, i2, False, {0: [], 1: [i1, i12], 2: [i2]})
+                    i22 = index.greater[i12]
+                    if i22 != i12 and not index.closed_adjacent(i22, i1):
+                        if opt[True][i22] > opt[True][v] + 4:
+                            opt[True][i22] = opt[True][v] + 4
+                            updateSolution(sol, v, True, i22, True, (i1, i12), (i22,))
+                    i2 = index.greater[w]
+                    if not index.closed_adjacent(i2, i1):
+                        if not index.closed_adjacent(i2, i12):
+                            if opt[False][i2] > opt[True][v] + 4:
+                                opt[False][i2] = opt[True][v] + 4
+                                updateSolution(sol, v, True, i2, False, (i1, i12), (i2,))
                         else:
-                            if opt[i2, True] > opt[v, True] + 4:
-                                opt[i2, True] = opt[v, True] + 4
-                                updateSolution(sol, v, True, i2, True, {0: [], 1: [i1, i12], 2: [i2]})
+                            if opt[True][i2] > opt[True][v] + 4:
+                                opt[True][i2] = opt[True][v] + 4
+                                updateSolution(sol, v, True, i2, True, (i1, i12), (i2,))
             else:
-                n = lastVertex(graph)
-                if opt[n, True] > opt[v, True] + 2:
-                    opt[n, True] = opt[v, True] + 2
-                    updateSolution(sol, v, True, n, True, {0: [], 1: [i1, i12], 2: []})
+                n = index.last
+                if opt[True][n] > opt[True][v] + 2:
+                    opt[True][n] = opt[True][v] + 2
+                    updateSolution(sol, v, True, n, True, (i1, i12), ())
 
 
-def second_option_true(graph, v, opt, sol):
-    i1 = firstNonDominated(graph, v)
+def second_option_true(index, v, opt, sol):
+    i1 = index.first[v]
     if i1 is not None:
-        w = secondNonDominated(graph, v)
+        w = index.second[v]
         if w is not None:
             if w != i1:
-                i22 = greaterClosedNeighbor(graph, i1)
+                i22 = index.greater[i1]
                 if i22 != i1:
-                    if opt[i22, True] > opt[v, True] + 3:
-                        opt[i22, True] = opt[v, True] + 3
-                        updateSolution(sol, v, True, i22, True, {0: [], 1: [i1], 2: [i22]})
-                i2 = greaterClosedNeighbor(graph, w)
-                if i2 not in interval_graph.closedNeighbor(graph, i1):
-                    if opt[i2, False] > opt[v, True] + 3:
-                        opt[i2, False] = opt[v, True] + 3
-                        updateSolution(sol, v, True, i2, False, {0: [], 1: [i1], 2: [i2]})
+                    if opt[True][i22] > opt[True][v] + 3:
+                        opt[True][i22] = opt[True][v] + 3
+                        updateSolution(sol, v, True, i22, True, (i1,), (i22,))
+                i2 = index.greater[w]
+                if not index.closed_adjacent(i2, i1):
+                    if opt[False][i2] > opt[True][v] + 3:
+                        opt[False][i2] = opt[True][v] + 3
+                        updateSolution(sol, v, True, i2, False, (i1,), (i2,))
                 else:
-                    if opt[i2, True] > opt[v, True] + 3:
-                        opt[i2, True] = opt[v, True] + 3
-                        updateSolution(sol, v, True, i2, True, {0: [], 1: [i1], 2: [i2]})
+                    if opt[True][i2] > opt[True][v] + 3:
+                        opt[True][i2] = opt[True][v] + 3
+                        updateSolution(sol, v, True, i2, True, (i1,), (i2,))
         else:
-            n = lastVertex(graph)
-            if opt[n, True] > opt[v, True] + 1:
-                opt[n, True] = opt[v, True] + 1
-                updateSolution(sol, v, True, n, True, {0: [], 1: [i1], 2: []})
+            n = index.last
+            if opt[True][n] > opt[True][v] + 1:
+                opt[True][n] = opt[True][v] + 1
+                updateSolution(sol, v, True, n, True, (i1,), ())
 
 
-def third_option_true(graph, v, opt, sol):
-    w = firstNonDominated(graph, v)
+def third_option_true(index, v, opt, sol):
+    w = index.first[v]
     if w is not None:
-        i22 = greaterClosedNeighbor(graph, v)
+        i22 = index.greater[v]
         if i22 != v:
-            if opt[i22, True] > opt[v, True] + 2:
-                opt[i22, True] = opt[v, True] + 2
-                updateSolution(sol, v, True, i22, True, {0: [], 1: [], 2: [i22]})
-        i2 = greaterClosedNeighbor(graph, w)
-        if i2 not in interval_graph.closedNeighbor(graph, v):
-            if opt[i2, False] > opt[v, True] + 2:
-                opt[i2, False] = opt[v, True] + 2
-                updateSolution(sol, v, True, i2, False, {0: [], 1: [], 2: [i2]})
+            if opt[True][i22] > opt[True][v] + 2:
+                opt[True][i22] = opt[True][v] + 2
+                updateSolution(sol, v, True, i22, True, (), (i22,))
+        i2 = index.greater[w]
+        if not index.closed_adjacent(i2, v):
+            if opt[False][i2] > opt[True][v] + 2:
+                opt[False][i2] = opt[True][v] + 2
+                updateSolution(sol, v, True, i2, False, (), (i2,))
         else:
-            if opt[i2, True] > opt[v, True] + 2:
-                opt[i2, True] = opt[v, True] + 2
-                updateSolution(sol, v, True, i2, True, {0: [], 1: [], 2: [i2]})
+            if opt[True][i2] > opt[True][v] + 2:
+                opt[True][i2] = opt[True][v] + 2
+                updateSolution(sol, v, True, i2, True, (), (i2,))
     else:
-        n = lastVertex(graph)
-        if opt[n, True] > opt[v, True]:
-            opt[n, True] = opt[v, True]
-            updateSolution(sol, v, True, n, True, {0: [], 1: [], 2: []})
+        n = index.last
+        if opt[True][n] > opt[True][v]:
+            opt[True][n] = opt[True][v]
+            updateSolution(sol, v, True, n, True, (), ())
 
 
-def second_option_false(graph, v, opt, sol):
-    i1 = greaterClosedNeighbor(graph, v)
+def second_option_false(index, v, opt, sol):
+    i1 = index.greater[v]
     if i1 is not None and i1 != v:
-        w = firstNonDominated(graph, v)
+        w = index.first[v]
         if w is not None:
             if w != i1:
-                i22 = greaterClosedNeighbor(graph, i1)
-                if i22 != i1 and i22 in interval_graph.closedNeighbor(graph,w):
-                    if opt[i22, True] > opt[v, False] + 3:
-                        opt[i22, True] = opt[v, False] + 3
-                        updateSolution(sol, v, False, i22, True, {0: [], 1: [i1], 2: [i22]})
-                i2 = greaterClosedNeighbor(graph, w)
-                if i2 not in interval_graph.closedNeighbor(graph, i1):
-                    if opt[i2, False] > opt[v, False] + 3:
-                        opt[i2, False] = opt[v, False] + 3
-                        updateSolution(sol, v, False, i2, False, {0: [], 1: [i1], 2: [i2]})
+                i22 = index.greater[i1]
+                if i22 != i1 and index.closed_adjacent(i22, w):
+                    if opt[True][i22] > opt[False][v] + 3:
+                        opt[True][i22] = opt[False][v] + 3
+                        updateSolution(sol, v, False, i22, True, (i1,), (i22,))
+                i2 = index.greater[w]
+                if not index.closed_adjacent(i2, i1):
+                    if opt[False][i2] > opt[False][v] + 3:
+                        opt[False][i2] = opt[False][v] + 3
+                        updateSolution(sol, v, False, i2, False, (i1,), (i2,))
                 else:
-                    if opt[i2, True] > opt[v, False] + 3:
-                        opt[i2, True] = opt[v, False] + 3
-                        updateSolution(sol, v, False, i2, True, {0: [], 1: [i1], 2: [i2]})
+                    if opt[True][i2] > opt[False][v] + 3:
+                        opt[True][i2] = opt[False][v] + 3
+                        updateSolution(sol, v, False, i2, True, (i1,), (i2,))
         else:
-            n = lastVertex(graph)
-            if opt[n, True] > opt[v, False] + 1:
-                opt[n, True] = opt[v, False] + 1
-                updateSolution(sol, v, False, n, True, {0: [], 1: [i1], 2: []})
+            n = index.last
+            if opt[True][n] > opt[False][v] + 1:
+                opt[True][n] = opt[False][v] + 1
+                updateSolution(sol, v, False, n, True, (i1,), ())
 
 
-def third_option_false(graph, v, opt, sol):
-    i2 = greaterClosedNeighbor(graph, v)
+def third_option_false(index, v, opt, sol):
+    i2 = index.greater[v]
     if i2 != v:
-        if opt[i2, True] > opt[v, False] + 2:
-            opt[i2, True] = opt[v, False] + 2
-            updateSolution(sol, v, False, i2, True, {0: [], 1: [], 2: [i2]})
+        if opt[True][i2] > opt[False][v] + 2:
+            opt[True][i2] = opt[False][v] + 2
+            updateSolution(sol, v, False, i2, True, (), (i2,))
 
 
 def connectedGraphs(graph):
-    res = []
+    """
+    Connected components of a graph with a single sweep over its sorted endpoints, a component ends when no interval
+    is open anymore. Endpoints can be any numbers, on a shared position the right endpoints come first so touching
+    intervals are in different components.
+
+    :param graph: a graph
+    :return: generator of the components, each one in left growing order
+    """
+    events = []
+    for i, (left, right) in enumerate(graph):
+        events.append((left, 1, i))
+        events.append((right, 0 if left < right else 2, i))
+    events.sort()
     interval_began = 0
     subGraph = []
-    for i in range(0, 2 * len(graph)):
-        l = list(filter(lambda x: x[0] == i, graph))
-        r = list(filter(lambda x: x[1] == i, graph))
-        if len(l) != 0:
+    for _, kind, i in events:
+        if kind == 1:
             interval_began += 1
-            subGraph.append(l[0])
-        if len(r) != 0:
-            if interval_began == 1:
-                res.append(subGraph.copy())
-                subGraph.clear()
+            subGraph.append(graph[i])
+        else:
             interval_began -= 1
-    return res
+            if interval_began == 0:
+                yield subGraph
+                subGraph = []
 
 
 def connectedQtrd_v2(graph):
-    max_value = 2 * len(graph)
-    init = (-1, -1)
-    opt = {(init, True): 0, (init, False): max_value}
-    sol = {(init, True): {0: graph, 1: [], 2: []}}
-    for v in graph:
-        if v != init:
-            opt[v, True] = max_value
-            opt[v, False] = max_value
-            sol[v, True] = {0: [], 1: [], 2: []}
-            sol[v, False] = {0: [], 1: [], 2: []}
-    first_option_true(graph, init, opt, sol)
-    second_option_true(graph, init, opt, sol)
-    third_option_true(graph, init, opt, sol)
-    sorted_graph = rightGrowingSort(graph)
-    for v in sorted_graph:
-        if opt[v, True] != max_value:
-            first_option_true(graph, v, opt, sol)
-            second_option_true(graph, v, opt, sol)
-            third_option_true(graph, v, opt, sol)
-        if opt[v, False] != max_value:
-            second_option_false(graph, v, opt, sol)
-            third_option_false(graph, v, opt, sol)
-    return sol[lastVertex(graph), True], opt[lastVertex(graph), True]
-
-
-def qtrd_v2(graph):
+    """
+    QTRD DP on a connected graph. The tables of ComponentIndex assume distinct endpoints, so the DP runs on the
+    normalized model, where shared endpoints are ranked right endpoints first as in connectedGraphs, and the labels are
+    mapped back to the intervals by position.
+
+    :param graph: a connected graph
+    :return: the qtrd solution for the graph and its value
+    """
+    graph = list(graph)
+    normalized = interval_graph.normalizeGraph(graph)
+    original = dict(zip(normalized, graph)) # the normalized intervals are distinct
+    index = ComponentIndex(normalized)
+    n = len(index.graph)
+    max_value = 2 * n
+    opt = [[max_value] * (n + 1), [max_value] * (n + 1)] # opt[b][v], b False or True
+    opt[True][0] = 0
+    sol = [[None] * (n + 1), [None] * (n + 1)] # predecessor state and added vertices of the last relaxation
+    first_option_true(index, 0, opt, sol)
+    second_option_true(index, 0, opt, sol)
+    third_option_true(index, 0, opt, sol)
+    for v in range(1, n + 1):
+        if opt[True][v] != max_value:
+            first_option_true(index, v, opt, sol)
+            second_option_true(index, v, opt, sol)
+            third_option_true(index, v, opt, sol)
+        if opt[False][v] != max_value:
+            second_option_false(index, v, opt, sol)
+            third_option_false(index, v, opt, sol)
+    solution = buildSolution(index, sol, index.last, True)
+    return {label: [original[v] for v in solution[label]] for label in solution}, opt[True][index.last]
+
+
+def qtrd_v2(graph, asLabeling=False):
+    """
+    Second version of the QTRD algorithm, the DP on every connected component
+
+    :param graph: a graph
+    :param asLabeling: True to return a Labeling instead of the {0: V0, 1: V1, 2: V2} format
+    :return: the qtrd solution for the graph and its value
+    """
     subgraphs = connectedGraphs(graph)
     qtrd = {0: [], 1: [], 2: []}
     qtrd_value = 0
@@ -235,67 +302,110 @@ def qtrd_v2(graph):
         for i in range(3):
             qtrd[i].extend(tmp_sol[i].copy())
         qtrd_value += tmp_val
+    if asLabeling:
+        return Labeling.fromSolution(graph, qtrd), qtrd_value
     return qtrd, qtrd_value
 
 
-def counter_example(graph, saveExample=False):
+def streamComponents(intervals):
     """
-    Compare the second version of QTRD algorithm to the Brute Force
+    Connected components of intervals given in left growing order, a component ends at the first interval starting at
+    or after the greatest right endpoint seen so far. Only the current component is kept in memory.
+
+    :param intervals: an iterable of intervals sorted by left endpoint
+    :return: generator of the components
+    """
+    subGraph = []
+    maxRight = None
+    previousLeft = None
+    for interval in intervals:
+        left, right = interval
+        if previousLeft is not None and left < previousLeft:
+            raise ValueError("intervals must be sorted by left endpoint, " + str(interval) + " comes after "
+                             + str(previousLeft))
+        previousLeft = left
+        if subGraph and left >= maxRight:
+            yield subGraph
+            subGraph = []
+        if not subGraph or right > maxRight:
+            maxRight = right
+        subGraph.append(interval)
+    if subGraph:
+        yield subGraph
+
+
+def qtrd_v2_stream(intervals):
+    """
+    qtrd_v2 on a stream of intervals sorted by left endpoint, each component is solved as soon as it ends and then
+    dropped, so memory is bounded by the largest component
+
+    :param intervals: an iterable of intervals sorted by left endpoint
+    :return: generator of the solution of each component, its value and the value of all the components so far
+    """
+    qtrd_value = 0
+    for subgraph in streamComponents(intervals):
+        tmp_sol, tmp_val = connectedQtrd_v2(subgraph)
+        qtrd_value += tmp_val
+        yield tmp_sol, tmp_val, qtrd_value
+
+
+def checkGraph(graph, exact=None, bound=True):
+    """
+    Compare the second version of QTRD algorithm to the exact solver, without any output so it can run in a worker
 
     :param graph: a graph
-    :return: True if QTRDV2 solution is minimal
+    :param exact: a known minimal QTRD solution for the graph, None to solve it
+    :param bound: True to skip the exact solver when the algorithm value meets the lower bound
+    :return: None if QTRDV2 solution is minimal, else the counter example (graph, algorithm solution, algorithm value,
+    exact solution, exact value)
     """
+    graph = interval_graph.toIntervalGraph(graph)
     qtrd_sol, qtrdValue = qtrd_v2(graph)
     #qtrdValue = qtrd.qtrdChecker(graph, qtrd)
-    bruteForce = qtrd.qtrdBruteForce(graph)
+    if exact is None and bound and qtrd.certified(graph, qtrd.qtrdChecker(graph, qtrd_sol), qtrdValue):
+        return None
+    bruteForce = exact if exact is not None else qtrd.exactSolution(graph)
     bruteForceValue = qtrd.qtrdChecker(graph, bruteForce)
     if qtrdValue != bruteForceValue:
-        print(graph)
-        print("QTRD value from algorithm : ", qtrdValue, "\n", qtrd_sol)
-        print("QTRD value from brute force :", bruteForceValue, "\n", bruteForce)
-        qtrd.drawWithSolution(qtrd_sol, "QTRD from Algorithm")
-        path = "qtrdv1/"
-        if saveExample and not os.path.exists(path):
-            os.makedirs(path)
-        if saveExample:
-            plt.savefig(path + "algo_" + saveExample)
-            print("Algorithm solution for counter example saved at : \"", path, "algo_", saveExample, "\"")
-        qtrd.drawWithSolution(bruteForce, "QTRD from brute force")
-        if saveExample:
-            plt.savefig(path + "bruteforce_" + saveExample)
-            print("Brute force solution for counter example saved at : \"", path, "bruteforce_", saveExample, "\"")
-        plt.show()
+        return graph.intervals, qtrd_sol, qtrdValue, bruteForce, bruteForceValue
+    return None
+
+
+def counter_example(graph, saveExample=False, minimize=False):
+    """
+    Compare the second version of QTRD algorithm to the Brute Force
+
+    :param graph: a graph
+    :param saveExample: the name to save the plots with, False to only show them
+    :param minimize: True to report a locally minimal counter example found by qtrd.minimizeCounterExample
+    :return: True if QTRDV2 solution is minimal
+    """
+    counterExample = checkGraph(graph)
+    if counterExample is not None:
+        if minimize:
+            counterExample = qtrd.minimizeCounterExample(checkGraph, counterExample[0])
+        qtrd.reportCounterExample(counterExample, saveExample)
         return False
     return True
 
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='Compare QTRD function value with Brute Force on interval graph')
-    parser.add_argument('-s', '--samples', type=int, help='the samples number', default=1)
-    parser.add_argument('-o', '--order', type=int, help='the graphs order for the generation, no value --> randomly '
-                                                        'generated', default=-1)
-    parser.add_argument('-se', '--saveExample', type=str, dest='saveExample', help='save with the name the counter '
-                                                                                   'example if exist')
+    qtrd.addSearchArguments(parser)
+    parser.add_argument('--stream', type=argparse.FileType('r'), help='solve the intervals of a file, one "left '
+                                                                      'right" per line sorted by left endpoint, - for '
+                                                                      'stdin, and print "left right label" lines')
     args = vars(parser.parse_args())
-
-    cpt = 1
-
-    if args['order'] < 1:
-        for i in tqdm(range(args['samples'])):
-            order = random.randint(10,10)
-            graph = interval_graph.intervalGraphGen(order)
-            qtrd_sol, qtrd_val = qtrd_v2(graph)
-            if not counter_example(graph, args['saveExample']):
-                break
-
-            cpt += 1
+    if args['stream']:
+        if args['profile']:
+            profiling.enable()
+        value = 0
+        for solution, _, value in qtrd_v2_stream(interval_graph.readIntervals(args['stream'])):
+            for label in range(3):
+                for left, right in solution[label]:
+                    print(left, right, label)
+        print("QTRD value :", value)
+        if args['profile']:
+            print(profiling.disable().report())
     else:
-        graphsPos = interval_graph.intervalGraphBruteForceGenerator(args['order'])
-        graphs = []
-        for graphPos in graphsPos:
-            graph = interval_graph.graphFromPosition(graphPos)
-            graphs.append(graph)
-        for graph in tqdm(graphs):
-            if not counter_example(graph, args['saveExample']):
-                break
-            cpt += 1
+        qtrd.runSearch(checkGraph, args, 10, 10)